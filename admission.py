@@ -0,0 +1,189 @@
+"""Admission control in front of the graph and rate limits in front of each upstream.
+
+`AdmissionController` caps in-flight plans and keeps a bounded priority queue
+(interactive before batch); when the queue is full it raises `Overloaded` with
+a Retry-After estimate instead of letting requests pile onto the upstreams.
+`TokenBucket` / `UpstreamLimit` pace the real OpenAI and Tavily calls to their
+configured requests/sec and tokens/min, shared by sync and async callers.
+Limits are per worker process.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+
+import config
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Server is at capacity, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def upstream_retry_after(error):
+    """Retry-After seconds if `error` is a 429 from OpenAI or Tavily, else None"""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    try:
+        return max(1, math.ceil(float(response.headers.get("retry-after", 1))))
+    except (AttributeError, ValueError):
+        return 1
+
+
+class TokenBucket:
+    """Classic token bucket; a rate of 0 or less means unlimited"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Take `amount` tokens now and return how long the caller must wait for them"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self, amount=1):
+        time.sleep(self.reserve(amount))
+
+    async def aacquire(self, amount=1):
+        await asyncio.sleep(self.reserve(amount))
+
+
+class UpstreamLimit:
+    """Requests/sec and (optionally) tokens/min limits for one upstream"""
+
+    def __init__(self, requests_per_second=0, tokens_per_minute=0):
+        self.requests = TokenBucket(requests_per_second)
+        self.tokens = TokenBucket(tokens_per_minute / 60, capacity=tokens_per_minute or None)
+
+    def _delay(self, tokens):
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens) if tokens else 0.0)
+
+    def acquire(self, tokens=0):
+        time.sleep(self._delay(tokens))
+
+    async def aacquire(self, tokens=0):
+        await asyncio.sleep(self._delay(tokens))
+
+
+class RateLimitedSearch:
+    """Paces real search calls through an UpstreamLimit"""
+
+    def __init__(self, search, limit):
+        self.search = search
+        self.limit = limit
+
+    def invoke(self, input):
+        self.limit.acquire()
+        return self.search.invoke(input)
+
+    async def ainvoke(self, input):
+        await self.limit.aacquire()
+        return await self.search.ainvoke(input)
+
+
+class AdmissionController:
+    """Bounded priority queue in front of at most `max_inflight` concurrent graph runs"""
+
+    def __init__(self, max_inflight, max_queue):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.rejected = 0
+        self.avg_latency = 5.0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    @property
+    def queued(self):
+        return sum(1 for *_, waiter in self._waiters if not waiter.cancelled())
+
+    def retry_after(self):
+        backlog = self.queued + 1
+        return max(1, math.ceil(self.avg_latency * backlog / self.max_inflight))
+
+    def full(self):
+        """True if a new request would be rejected right now"""
+        busy = self.inflight >= self.max_inflight or self._waiters
+        return bool(busy) and self.queued >= self.max_queue
+
+    async def acquire(self, priority="interactive", reject=True):
+        """Wait for a plan slot; raise Overloaded if the queue is full and `reject` is set"""
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            return
+
+        if reject and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (PRIORITIES.get(priority, 1), next(self._seq), waiter)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif entry in self._waiters:
+                # release() may already have popped and skipped the cancelled waiter.
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self, latency=None):
+        if latency is not None:
+            self.avg_latency = 0.9 * self.avg_latency + 0.1 * latency
+        while self._waiters:
+            *_, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+    def slot(self, priority="interactive", reject=True):
+        return _Slot(self, priority, reject)
+
+    def stats(self):
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "avg_latency_s": round(self.avg_latency, 3),
+        }
+
+
+class _Slot:
+    def __init__(self, controller, priority, reject):
+        self.controller = controller
+        self.priority = priority
+        self.reject = reject
+
+    async def __aenter__(self):
+        await self.controller.acquire(self.priority, self.reject)
+        self.start = time.perf_counter()
+
+    async def __aexit__(self, *exc):
+        self.controller.release(time.perf_counter() - self.start)
+
+
+openai_limit = UpstreamLimit(config.openai_requests_per_second, config.openai_tokens_per_minute)
+tavily_limit = UpstreamLimit(config.tavily_requests_per_second)
@@ -1,44 +1,350 @@
-from fastapi import  FastAPI, HTTPException
-from Travel_Agent import travel_agent
+from fastapi import  FastAPI, HTTPException, Request, Response
+from travel_core import travel_agent, search_cache, knowledge_search, plan_cache, router, tavily_search, search_timeout, build_travel_agent
+from plan_cache import Uncached, plan_text
+from batch import aplan_batch
+from admission import AdmissionController, Overloaded, openai_limit, upstream_retry_after
+from jobs import JobRunner, JobStore, DONE, FAILED
+from http_cache import json_response
+from degradation import DegradationPolicy, LEVELS, FULL
+from itinerary import SectionStream, trip_from_legs
+from capture import CaptureMiddleware, Recorder
+import asyncio
+import config
+import hmac
+import json
+import metrics
+import profiling
+import time
 from pydantic import BaseModel
-from typing import Literal
-from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 app = FastAPI(title="Travel Agent")
 
-class Input_schema(BaseModel):
+# Sampled traffic capture for offline replay (benchmarks/replay.py); absent unless CAPTURE_RATE > 0.
+if config.capture_rate > 0:
+    app.add_middleware(CaptureMiddleware, recorder=Recorder(config.capture_path, config.capture_rate))
+
+# Caps how many graph runs this worker keeps in flight; extra requests queue (interactive
+# ahead of batch) and are turned away with 429 once the queue is full.
+max_inflight_plans = config.max_inflight_plans
+admission = AdmissionController(max_inflight_plans, config.admission_queue_size)
+batch_concurrency = config.batch_concurrency
+
+# Under load, interactive plans shed research depth instead of queueing ever longer.
+degradation = DegradationPolicy(lambda: (admission.queued / max(1, admission.max_queue), admission.avg_latency))
+
+job_store = JobStore(config.cache_path, lease=config.job_lease, ttl=config.job_ttl)
+
+class Leg_schema(BaseModel):
     country             : str
-    interests           : list[str]
     departure_date      : str
     return_date         : str
+
+class Input_schema(BaseModel):
+    country             : str = ""
+    interests           : list[str]
+    departure_date      : str = ""
+    return_date         : str = ""
     travel_style        : Literal["budget", "luxury", "adventure", "relaxation"]
     trip_type           : Literal["solo", "friends", "family"]
     age_group           : Literal["child", "teen", "adult", "senior"]
     accommodation_type  : Literal["hotel", "hostel", "apartment", "bnb", "camping"]
+    legs                : list[Leg_schema] = []
 
 class Output_schema(BaseModel):
     final_result    : str
+    degradation     : str = "full"
+
+class Job_schema(BaseModel):
+    job_id          : str
+    status          : str
+    final_result    : Optional[str] = None
+    error           : Optional[str] = None
+
+class Batch_input_schema(BaseModel):
+    items           : list[Input_schema]
+    concurrency     : Optional[int] = None
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.api_latency.labels(request.method, path, response.status_code).observe(time.perf_counter() - start)
+    return response
 
 
 @app.get("/")
 def Home() -> dict:
     return {"Status" : "The Travel Agent API is Live."}
 
-@app.post("/response", response_model=Output_schema)
-async def response(input_data: Input_schema):
+async def plan(user_query: dict, callbacks: Optional[list] = None):
+    """Run the graph at the degradation level the current load calls for.
+
+    The level is read right before joining the admission queue, with no await in between,
+    so every request in a burst sees the queue built up ahead of it. Degraded plans come
+    back as Uncached((final_trip, level)) so the plan cache hands them out but never stores them.
+    """
+    queued = time.perf_counter()
+    level = degradation.level()
+    async with admission.slot("interactive"):
+        metrics.api_queue_wait.observe(time.perf_counter() - queued)
+        with metrics.api_inflight.track_inprogress():
+            result = await travel_agent.ainvoke(
+                {**user_query, "degradation": level}, config={"callbacks": callbacks} if callbacks else None
+            )
+    final_trip = result.get("final_trip", "")
+    return final_trip if level == FULL else Uncached((final_trip, level))
+
+def too_many_requests(retry_after: int) -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": str(retry_after)})
+
+@app.get("/metrics")
+def metrics_endpoint() -> Response:
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/http/stats")
+def http_stats() -> dict:
+    from upstream_http import http_pool
+    return http_pool.stats()
+
+@app.get("/cache/stats")
+def cache_stats() -> dict:
+    return {"search": search_cache.stats(), "knowledge": knowledge_search.stats(), "plans": plan_cache.stats()}
+
+@app.get("/admission/stats")
+def admission_stats() -> dict:
+    return admission.stats()
+
+def trip_request(input_data: Input_schema) -> dict:
+    """The request as graph input; multi-leg trips get their country and dates from the legs"""
     try:
-        user_query = input_data.dict()
+        return trip_from_legs(input_data.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def profile_requested(request: Request) -> bool:
+    """True if the request asks to be profiled (X-Profile: 1 or ?profile=1) and carries the admin token"""
+    if request.headers.get("x-profile") != "1" and request.query_params.get("profile") != "1":
+        return False
+    require_admin(request)
+    return True
 
-        result = travel_agent.invoke(user_query)
 
-        return {"final_result": result.get("final_trip", "")}
+def require_admin(request: Request) -> None:
+    token = request.headers.get("x-admin-token", "")
+    if not config.admin_token or not hmac.compare_digest(token, config.admin_token):
+        raise HTTPException(status_code=403, detail="A valid X-Admin-Token is required")
+
+
+@app.post("/response", response_model=Output_schema)
+async def response(input_data: Input_schema, request: Request):
+    user_query = trip_request(input_data)
+    if not profile_requested(request):
+        return await plan_response(user_query, request)
+
+    # Profiled runs bypass the plan cache so the graph really runs; the profile is kept for /profiles/{id}.
+    with profiling.Profile() as profile:
+        response = await plan_response(user_query, request, callbacks=[profile.node_timer])
+    profile_id = await asyncio.to_thread(profile.save)
+    response.headers["Cache-Control"] = "no-store"
+    if "content-location" in response.headers:
+        del response.headers["content-location"]
+    response.headers["X-Profile-Id"] = profile_id
+    response.headers["X-Profile-Location"] = f"/profiles/{profile_id}"
+    return response
+
+
+async def plan_response(user_query: dict, request: Request, callbacks: Optional[list] = None) -> Response:
+    try:
+        if callbacks:
+            result = await plan(user_query, callbacks)
+            result = result.value if isinstance(result, Uncached) else result
+        else:
+            result = await plan_cache.arun(user_query, plan)
+        final_trip, level = result if isinstance(result, tuple) else (result, FULL)
 
+        metrics.degraded_plans.labels(LEVELS[level]).inc()
+        payload = {"final_result": final_trip, "degradation": LEVELS[level]}
+        if level != FULL:
+            headers = {"X-Degradation-Level": str(level), "Cache-Control": "no-store"}
+            return json_response(request, payload, headers=headers)
+        key = plan_cache.key(user_query)
+        return json_response(
+            request, payload, key=key, headers={"X-Degradation-Level": "0", "Content-Location": f"/plans/{key}"}
+        )
+
+    except Overloaded as e:
+        raise too_many_requests(e.retry_after)
     except Exception as e:
+        retry_after = upstream_retry_after(e)
+        if retry_after is not None:
+            raise too_many_requests(retry_after)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request, format: str = "json"):
+    """A stored request profile: per-node timings, or with ?format=folded the stacks for a flamegraph"""
+    require_admin(request)
+    profile = await asyncio.to_thread(profiling.load, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    summary, folded = profile
+    if format == "folded":
+        return PlainTextResponse(folded)
+    return summary
+
+
+@app.get("/plans/{key}", response_model=Output_schema)
+async def get_plan(key: str, request: Request):
+    """Cacheable GET for a plan already made through /response (see its Content-Location header)"""
+    final_trip = await plan_cache.aget(key)
+    if final_trip is None:
+        raise HTTPException(status_code=404, detail="Plan not found or expired")
+    return json_response(request, {"final_result": final_trip, "degradation": LEVELS[FULL]}, key=key)
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/response/stream")
+async def response_stream(input_data: Input_schema):
+    user_query = trip_request(input_data)
+
+    # Reject before the 200 is sent; the slot itself is taken inside the stream so a
+    # client that disconnects early never leaks it.
+    if admission.full():
+        admission.rejected += 1
+        raise too_many_requests(admission.retry_after())
+
+    level = degradation.level()
+    metrics.degraded_plans.labels(LEVELS[level]).inc()
+    user_query["degradation"] = level
+
+    async def events():
+        async with admission.slot("interactive", reject=False):
+            usage = {}
+            # Long and multi-leg trips are written in parallel sections; their text goes out in order.
+            sections = SectionStream()
+            try:
+                async for mode, chunk in travel_agent.astream(user_query, stream_mode=["updates", "messages"]):
+                    if mode == "updates":
+                        for node, update in chunk.items():
+                            yield sse("phase", {"node": node, "status": "done"})
+                            for kind, tokens in ((update or {}).get("token_usage") or {}).items():
+                                usage[kind] = usage.get(kind, 0) + tokens
+                            for section in (update or {}).get("sections") or []:
+                                text = sections.done(section["index"], section["text"])
+                                if text:
+                                    yield sse("token", {"text": text})
+                            if node == "merge_node" and update["final_trip"].startswith(sections.text):
+                                rest = update["final_trip"][len(sections.text):]
+                                if rest:
+                                    yield sse("token", {"text": rest})
+                    else:
+                        message, metadata = chunk
+                        if not message.content:
+                            continue
+                        if metadata.get("langgraph_node") == "trip_planner_node":
+                            yield sse("token", {"text": message.content})
+                        elif metadata.get("langgraph_node") == "section_node":
+                            text = sections.token(metadata["section"], message.content)
+                            if text:
+                                yield sse("token", {"text": text})
+                yield sse("done", {"usage": usage, "degradation": LEVELS[level]})
+            except Exception as e:
+                yield sse("error", {"detail": str(e), "retry_after": upstream_retry_after(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def build_batch_agent(search):
+    return build_travel_agent(router, search, search_timeout=search_timeout, llm_limit=openai_limit)
+
+
+@app.post("/response/batch")
+async def response_batch(batch: Batch_input_schema):
+    concurrency = min(batch.concurrency or batch_concurrency, batch_concurrency)
+    items = [trip_request(item) for item in batch.items]
+
+    async def lines():
+        async for index, final_trip, error in aplan_batch(
+            items, build_batch_agent, tavily_search, concurrency, plan_cache,
+            admit=lambda: admission.slot("batch", reject=False),
+        ):
+            if error is None:
+                yield json.dumps({"index": index, "final_result": final_trip}) + "\n"
+            else:
+                yield json.dumps({"index": index, "error": error}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def plan_job(user_query: dict) -> str:
+    async def run(user_query: dict) -> str:
+        async with admission.slot("batch", reject=False):
+            result = await travel_agent.ainvoke(user_query)
+        return result.get("final_trip", "")
+
+    # The job may have waited on a degraded /response run of the same request.
+    return plan_text(await plan_cache.arun(user_query, run))
+
+
+job_runner = JobRunner(job_store, plan_job, workers=config.job_workers)
+
+
+@app.on_event("startup")
+async def start_job_runner():
+    job_runner.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    await job_runner.stop()
+
+
+@app.post("/jobs", response_model=Job_schema, status_code=202)
+async def submit_job(input_data: Input_schema, response: Response):
+    job_id = await asyncio.to_thread(job_store.submit, trip_request(input_data))
+    job_runner.notify()
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return {"job_id": job_id, "status": "queued"}
+
 
+@app.get("/jobs/{job_id}", response_model=Job_schema)
+async def get_job(job_id: str, request: Request):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return json_response(request, job, headers={"Cache-Control": "no-cache"})
 
 
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, poll_interval: float = 0.5):
+    if await asyncio.to_thread(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
 
+    async def events():
+        last_status = None
+        while True:
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield sse("status", {"job_id": job_id, "status": last_status})
+            if last_status in (DONE, FAILED):
+                yield sse("result", job)
+                return
+            await asyncio.sleep(max(0.1, poll_interval))
 
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from cache import normalize_query
+from plan_cache import plan_text
+
+
+class SharedSearch:
+    """Wraps a search client so every item in a batch reuses one call per normalized query"""
+
+    def __init__(self, search):
+        self.search = search
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._tasks = {}
+
+    def invoke(self, input):
+        key = normalize_query(input["query"])
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                future.set_result(self.search.invoke(input))
+            except Exception as e:
+                future.set_exception(e)
+                with self._lock:
+                    del self._futures[key]
+        return future.result()
+
+    async def ainvoke(self, input):
+        key = normalize_query(input["query"])
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(self.search.ainvoke(input))
+
+            def forget_failure(task):
+                if task.cancelled() or task.exception() is not None:
+                    self._tasks.pop(key, None)
+
+            task.add_done_callback(forget_failure)
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def peek(self, input):
+        peek = getattr(self.search, "peek", None)
+        return peek(input) if peek is not None else None
+
+    async def apeek(self, input):
+        apeek = getattr(self.search, "apeek", None)
+        return await apeek(input) if apeek is not None else None
+
+
+async def aplan_batch(items, build_agent, search, concurrency=8, plan_cache=None, admit=None):
+    """Plan many trips at once, yielding (index, final_trip, error) as each one finishes.
+
+    `build_agent(search)` must return a compiled travel agent graph; it is
+    called once with a SharedSearch so identical queries across items are
+    issued once. At most `concurrency` items are in flight, and only those
+    are held in memory. `admit()`, if given, returns an async context manager
+    each graph run is wrapped in (e.g. an admission-control slot).
+    """
+    agent = build_agent(SharedSearch(search))
+    items = iter(enumerate(items))
+    done = asyncio.Queue(maxsize=max(1, concurrency))
+
+    async def plan(request):
+        if admit is None:
+            result = await agent.ainvoke(request)
+        else:
+            async with admit():
+                result = await agent.ainvoke(request)
+        return result.get("final_trip", "")
+
+    async def worker():
+        for index, request in items:
+            try:
+                if plan_cache is not None:
+                    final_trip = plan_text(await plan_cache.arun(request, plan))
+                else:
+                    final_trip = await plan(request)
+                await done.put((index, final_trip, None))
+            except Exception as e:
+                await done.put((index, None, str(e)))
+        await done.put(None)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            item = await done.get()
+            if item is None:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for w in workers:
+            w.cancel()
+
+
+def plan_batch(items, build_agent, search, concurrency=8, plan_cache=None):
+    """Threaded version of aplan_batch for synchronous callers"""
+    agent = build_agent(SharedSearch(search))
+
+    def plan(request):
+        return agent.invoke(request).get("final_trip", "")
+
+    def run(request):
+        if plan_cache is not None:
+            return plan_cache.run(request, plan)
+        return plan(request)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(run, request): index for index, request in enumerate(items)}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, str(e)
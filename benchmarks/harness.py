@@ -0,0 +1,241 @@
+"""Offline benchmark suite: the compiled graph and POST /response against local stubs.
+
+Starts `StubServer` in-process, points the real OpenAI and Tavily clients at it
+(caches disabled), and drives either the `travel_agent` graph directly or the
+app.py API through an in-process ASGI client at each concurrency level. For
+every level it reports p50/p95/p99 latency, throughput and peak traced memory
+per in-flight request; graph runs also get a per-node latency breakdown, timed
+by callbacks around each node run so parallel section nodes are timed
+separately. Memory is traced in a separate wave of requests after the timed
+one, since tracemalloc slows down every allocation it records.
+Results are written to bench_results/<commit>.json so runs can be compared.
+
+    python -m benchmarks.harness --target graph api --concurrency 1 8 32 --requests 64
+    python -m benchmarks.harness --compare bench_results/abc1234.json   # run, then diff
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from benchmarks.stub_servers import StubServer
+
+base_request = {
+    "country": "Japan",
+    "interests": ["food", "culture"],
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-08",
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "adult",
+    "accommodation_type": "hostel",
+}
+
+
+def request(i):
+    # Distinct countries keep request coalescing from merging runs.
+    return {**base_request, "country": f"Japan {i}"}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def point_at_stubs(stub):
+    scratch = tempfile.mkdtemp()
+    os.environ.update({
+        "TAVILY_BASE_URL": stub.url,
+        "OPENAI_BASE_URL": stub.url + "/v1",
+        "OPENAI_API_KEY": "sk-stub",
+        "TAVILY_API_KEY": "tvly-stub",
+        "SEARCH_CACHE_TTL": "0",
+        "PLAN_CACHE_TTL": "0",
+        "CACHE_PATH": os.path.join(scratch, "bench.sqlite"),
+        "KNOWLEDGE_INDEX_PATH": os.path.join(scratch, "no-index"),
+    })
+
+
+async def run_graph(agent, i, node_times, usage):
+    # Imported late, like travel_core: profiling reads config, which must see point_at_stubs' environment.
+    from profiling import NodeTimer
+
+    start = time.perf_counter()
+    timer = NodeTimer(start)
+    async for update in agent.astream(request(i), stream_mode="updates", config={"callbacks": [timer]}):
+        for values in update.values():
+            usage.update((values or {}).get("token_usage") or {})
+    elapsed = time.perf_counter() - start
+    for entry in timer.nodes:
+        node_times[entry["node"]].append(entry["duration"])
+    return elapsed
+
+
+async def run_api(client, i, node_times, usage):
+    start = time.perf_counter()
+    response = await client.post("/response", json=request(i))
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def traced_peak(call, concurrency, first):
+    """Peak traced memory of one full wave of `concurrency` requests, outside the timed pass"""
+    tracemalloc.start()
+    try:
+        await asyncio.gather(
+            *(call(first + i, defaultdict(list), Counter()) for i in range(concurrency)), return_exceptions=True
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+async def run_level(call, concurrency, total):
+    latencies, node_times, usage = [], defaultdict(list), Counter()
+    slots = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with slots:
+            try:
+                latencies.append(await call(i, node_times, usage))
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    peak = await traced_peak(call, concurrency, first=total)
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "throughput_rps": len(latencies) / elapsed,
+        "peak_kb_per_inflight": peak / 1024 / concurrency,
+        "nodes_p50_s": {node: percentile(times, 50) for node, times in node_times.items()},
+        "prompt_tokens_per_req": usage["prompt"] / max(1, len(latencies)),
+        "cached_prompt_ratio": usage["cached_prompt"] / usage["prompt"] if usage["prompt"] else 0.0,
+    }
+
+
+async def run_target(target, levels, total):
+    import httpx
+
+    if target == "graph":
+        from travel_core import travel_agent
+
+        async def call(i, node_times, usage):
+            return await run_graph(travel_agent, i, node_times, usage)
+
+        return [await run_level(call, c, total) for c in levels]
+
+    import app as api
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def call(i, node_times, usage):
+            return await run_api(client, i, node_times, usage)
+
+        return [await run_level(call, c, total) for c in levels]
+
+
+async def run_targets(targets, levels, total):
+    # One event loop for everything: the shared async HTTP pool is bound to it.
+    return {t: await run_target(t, levels, total) for t in targets}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def print_results(results):
+    for target, levels in results["targets"].items():
+        print(f"\n{target}")
+        print(f"{'conc':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'KB/req':>8} {'err':>4}")
+        for r in levels:
+            print(f"{r['concurrency']:>5} {r['p50_s']:>8.3f} {r['p95_s']:>8.3f} {r['p99_s']:>8.3f} "
+                  f"{r['throughput_rps']:>8.1f} {r['peak_kb_per_inflight']:>8.1f} {r['errors']:>4}")
+            if r["nodes_p50_s"]:
+                print("      " + "  ".join(f"{n}={t:.3f}s" for n, t in r["nodes_p50_s"].items()))
+            if r.get("prompt_tokens_per_req"):
+                print(f"      prompt tokens/req={r['prompt_tokens_per_req']:.0f}  cached={r['cached_prompt_ratio']:.0%}")
+
+
+def compare(current, baseline):
+    print(f"\nvs {baseline['commit']}")
+    for target, levels in current["targets"].items():
+        old = {r["concurrency"]: r for r in baseline["targets"].get(target, [])}
+        for r in levels:
+            b = old.get(r["concurrency"])
+            if b is None:
+                continue
+            print(f"{target:>6} c={r['concurrency']:<4} "
+                  f"p95 {b['p95_s']:.3f}->{r['p95_s']:.3f}s ({(r['p95_s'] / b['p95_s'] - 1) * 100:+.1f}%)  "
+                  f"req/s {b['throughput_rps']:.1f}->{r['throughput_rps']:.1f}  "
+                  f"prompt tokens {b.get('prompt_tokens_per_req', 0):.0f}->{r['prompt_tokens_per_req']:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", nargs="+", choices=["graph", "api"], default=["graph", "api"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=300)
+    parser.add_argument("--results-per-query", type=int, default=7)
+    parser.add_argument("--result-chars", type=int, default=800)
+    parser.add_argument("--min-cached-prefix", type=int, default=1024)
+    parser.add_argument("--output", help="results file (default bench_results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    stub = StubServer(
+        search_latency=args.search_latency,
+        llm_latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        results_per_query=args.results_per_query,
+        result_chars=args.result_chars,
+        min_cached_prefix=args.min_cached_prefix,
+    )
+    with stub:
+        point_at_stubs(stub)
+        results = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": vars(args),
+            "targets": asyncio.run(run_targets(args.target, args.concurrency, args.requests)),
+        }
+
+    print_results(results)
+    output = args.output or os.path.join("bench_results", f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Check connection reuse of the shared HTTP pool against the local stub servers.
+
+Sends bursts of concurrent search and chat-completion calls through the same
+clients the graph uses and compares the requests served with the TCP
+connections the stub had to accept.
+
+    python -m benchmarks.http_pool --bursts 5 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.stub_servers import StubServer
+
+
+async def burst(llm, search, concurrency):
+    calls = [search.ainvoke({"query": f"stub query {i}"}) for i in range(concurrency)]
+    calls += [llm.ainvoke("Plan a short trip") for _ in range(concurrency // 4 or 1)]
+    await asyncio.gather(*calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    with StubServer(search_latency=0.05, llm_latency=0.05, completion_tokens=20) as stub:
+        os.environ.update({
+            "TAVILY_BASE_URL": stub.url,
+            "OPENAI_BASE_URL": stub.url + "/v1",
+            "OPENAI_API_KEY": "sk-stub",
+            "TAVILY_API_KEY": "tvly-stub",
+        })
+        from travel_core import make_llm, make_search
+        from upstream_http import http_pool
+
+        llm, search = make_llm(), make_search()
+
+        async def run():
+            for _ in range(args.bursts):
+                await burst(llm, search, args.concurrency)
+
+        asyncio.run(run())
+        print(f"requests served: {stub.requests}  TCP connections accepted: {stub.connections}")
+        print(http_pool.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Concurrent load test for POST /response against stubbed upstreams.
+
+Fires N distinct trip requests at once (distinct so the itinerary cache
+and request coalescing do not hide the work), first through a copy of the old
+handler (sync `travel_agent.invoke` inside an async route) and then through
+the real async `/response`, and reports wall time for each. Both routes are
+served from a copy of the API's routes, so the real app never gets the old one.
+
+    python -m benchmarks.load --requests 50 --search-delay 0.3 --llm-latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+import app as api
+from cache import DiskCache
+from fakes import FakeChatModel, FakeSearch
+from plan_cache import PlanCache
+from travel_core import build_travel_agent
+
+base_payload = {
+    "country": "Japan",
+    "interests": ["food", "culture"],
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-08",
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "adult",
+    "accommodation_type": "hostel",
+}
+
+
+def payload(i):
+    return {**base_payload, "country": f"Japan {i}"}
+
+
+async def response_blocking(input_data: api.Input_schema):
+    result = api.travel_agent.invoke(input_data.dict())
+    return {"final_result": result.get("final_trip", "")}
+
+
+def bench_app():
+    """The API's routes plus /response_blocking, on a separate app"""
+    bench = FastAPI()
+    bench.include_router(api.app.router)
+    bench.post("/response_blocking", response_model=api.Output_schema)(response_blocking)
+    return bench
+
+
+async def fire(app, path, n):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.post(path, json=payload(i)) for i in range(n)))
+        elapsed = time.perf_counter() - start
+    failed = sum(r.status_code != 200 for r in responses)
+    return elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--search-delay", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--skip-blocking", action="store_true", help="only run the async path")
+    args = parser.parse_args()
+
+    api.travel_agent = build_travel_agent(
+        FakeChatModel(latency=args.llm_latency),
+        FakeSearch(default_delay=args.search_delay),
+    )
+    api.plan_cache = PlanCache(DiskCache(os.path.join(tempfile.mkdtemp(), "bench.sqlite"), "plans", ttl=0))
+    bench = bench_app()
+    single = args.search_delay + args.llm_latency
+    print(f"{args.requests} concurrent requests, ~{single:.2f}s of upstream time each")
+
+    if not args.skip_blocking:
+        elapsed, failed = asyncio.run(fire(bench, "/response_blocking", args.requests))
+        print(f"blocking handler : {elapsed:7.2f}s  {args.requests / elapsed:6.1f} req/s  failed={failed}")
+
+    elapsed, failed = asyncio.run(fire(bench, "/response", args.requests))
+    print(f"async handler    : {elapsed:7.2f}s  {args.requests / elapsed:6.1f} req/s  failed={failed}")
+    print(f"MAX_INFLIGHT_PLANS={api.max_inflight_plans}")
+
+
+if __name__ == "__main__":
+    main()
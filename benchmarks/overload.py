@@ -0,0 +1,87 @@
+"""Synthetic overload: how the degradation policy sheds research as the queue backs up.
+
+Shrinks the admission limits so a burst of distinct requests queues, then fires
+the burst at POST /response twice, once with degradation disabled and once with
+the configured thresholds, using fakes for OpenAI and Tavily. Reports latency
+percentiles and how many responses came back at each degradation level.
+
+    python -m benchmarks.overload --requests 200 --max-inflight 8 --search-delay 0.5 --llm-latency 1.0
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+import app as api
+from admission import AdmissionController
+from benchmarks.harness import percentile
+from benchmarks.load import payload
+from cache import DiskCache
+from degradation import DegradationPolicy
+from fakes import FakeChatModel, FakeSearch
+from plan_cache import PlanCache
+from travel_core import build_travel_agent
+
+
+async def burst(n):
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        async def one(i):
+            start = time.perf_counter()
+            response = await client.post("/response", json=payload(i))
+            return time.perf_counter() - start, response
+
+        results = await asyncio.gather(*(one(i) for i in range(n)))
+    latencies = [t for t, r in results if r.status_code == 200]
+    levels = Counter(r.json()["degradation"] for _, r in results if r.status_code == 200)
+    rejected = sum(r.status_code == 429 for _, r in results)
+    return latencies, levels, rejected
+
+
+def run(args, policy):
+    api.admission = AdmissionController(args.max_inflight, args.queue)
+    api.degradation = policy
+    start = time.perf_counter()
+    latencies, levels, rejected = asyncio.run(burst(args.requests))
+    elapsed = time.perf_counter() - start
+    print(f"  wall {elapsed:.2f}s  p50 {percentile(latencies, 50):.2f}s  p95 {percentile(latencies, 95):.2f}s  "
+          f"p99 {percentile(latencies, 99):.2f}s  rejected={rejected}")
+    print("  levels: " + "  ".join(f"{level}={count}" for level, count in sorted(levels.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-inflight", type=int, default=8)
+    parser.add_argument("--queue", type=int, default=1000)
+    parser.add_argument("--search-delay", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--queue-thresholds", type=float, nargs="*", help="default DEGRADE_QUEUE_THRESHOLDS")
+    parser.add_argument("--latency-thresholds", type=float, nargs="*", help="default DEGRADE_LATENCY_THRESHOLDS")
+    args = parser.parse_args()
+
+    api.travel_agent = build_travel_agent(
+        FakeChatModel(latency=args.llm_latency),
+        FakeSearch(default_delay=args.search_delay),
+    )
+    api.plan_cache = PlanCache(DiskCache(os.path.join(tempfile.mkdtemp(), "bench.sqlite"), "plans", ttl=0))
+    load = lambda: (api.admission.queued / max(1, api.admission.max_queue), api.admission.avg_latency)  # noqa: E731
+
+    print(f"{args.requests} requests, {args.max_inflight} in flight, queue {args.queue}")
+    print("degradation off")
+    run(args, DegradationPolicy(load, [], []))
+    print("degradation on")
+    thresholds = {}
+    if args.queue_thresholds is not None:
+        thresholds["queue_thresholds"] = args.queue_thresholds
+    if args.latency_thresholds is not None:
+        thresholds["latency_thresholds"] = args.latency_thresholds
+    run(args, DegradationPolicy(load, **thresholds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Replay captured traffic against the API, with OpenAI and Tavily served from the recording.
+
+Reads a capture file written with CAPTURE_RATE > 0 (see capture.py), starts a
+`ReplayServer` that answers each upstream call with the recorded response and
+its original timing (time to headers, then every chunk at its recorded
+offset, so streamed completions keep their token pacing), and re-sends the
+captured API requests on their original schedule compressed by `--speed`.
+Reports replayed latency percentiles next to the recorded ones, so a traffic
+spike can be rerun offline before and after a change.
+
+Upstream calls are matched to the recording by a hash of their request body.
+When a change alters a prompt or a query, the call falls back to a recorded
+response for the same search query or model, then for the same kind of call.
+The match counts are printed.
+
+    python -m benchmarks.replay .cache/captures/capture-20250101-120000-ab12cd.jsonl.gz --speed 4
+    python -m benchmarks.replay capture.jsonl.gz --port 8900 --url http://localhost:8000   # running API
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.harness import percentile, point_at_stubs
+from benchmarks.stub_servers import StubServer
+from capture import load, request_key, upstream_kind
+
+
+class ReplayServer(StubServer):
+    """StubServer whose answers come from captured upstream exchanges; `scale` stretches their timing"""
+
+    def __init__(self, records, scale=1.0, host="127.0.0.1", port=0):
+        self.scale = scale
+        self.matches = Counter()
+        self._served = Counter()
+        self._exact, self._by_label, self._by_kind = defaultdict(list), defaultdict(list), defaultdict(list)
+        for record in records:
+            for exchange in record["upstream"]:
+                self._exact[exchange["kind"], exchange["key"]].append(exchange)
+                self._by_label[exchange["kind"], exchange["label"]].append(exchange)
+                self._by_kind[exchange["kind"]].append(exchange)
+        super().__init__(host=host, port=port)
+
+    def match(self, kind, key, label):
+        """(recorded exchange, how it matched) for an upstream call; repeated calls cycle through the candidates"""
+        for how, candidates in (("exact", self._exact.get((kind, key))),
+                                ("label", self._by_label.get((kind, label))),
+                                ("kind", self._by_kind.get(kind))):
+            if candidates:
+                served = (how, kind, key if how == "exact" else label)
+                with self._lock:
+                    self.matches[how] += 1
+                    n = self._served[served]
+                    self._served[served] += 1
+                return candidates[n % len(candidates)], how
+        with self._lock:
+            self.matches["missing"] += 1
+        return None, "missing"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server._count("connections")
+
+            def log_message(self, *args):
+                pass
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                server._count("requests")
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                key, label = request_key(body)
+                exchange, _ = server.match(upstream_kind(self.path), key, label)
+                if exchange is None:
+                    payload = json.dumps({"error": "no recorded exchange"}).encode()
+                    self.send_response(404)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                time.sleep(exchange["ttfb"] * server.scale)
+                self.send_response(exchange["status"])
+                self.send_header("Content-Type", exchange["content_type"] or "application/json")
+                if exchange.get("content_encoding"):
+                    self.send_header("Content-Encoding", exchange["content_encoding"])
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                elapsed = 0.0
+                for offset, data in exchange["chunks"]:
+                    time.sleep(max(0.0, offset - elapsed) * server.scale)
+                    elapsed = offset
+                    raw = base64.b64decode(data) if exchange.get("body_encoding") == "base64" else data.encode()
+                    if raw:
+                        self._chunk(raw)
+                self._chunk(b"")
+
+        return Handler
+
+
+async def replay(records, client, speed):
+    first = records[0]["at"]
+    start = time.perf_counter()
+
+    async def one(record):
+        await asyncio.sleep(max(0.0, (record["at"] - first) / speed - (time.perf_counter() - start)))
+        url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+        sent = time.perf_counter()
+        try:
+            response = await client.request(record["method"], url, json=record.get("body"))
+            await response.aread()
+            return time.perf_counter() - sent, response.status_code
+        except Exception:
+            return time.perf_counter() - sent, None
+
+    results = await asyncio.gather(*(one(r) for r in records))
+    return results, time.perf_counter() - start
+
+
+async def drive(records, url, speed):
+    import httpx
+
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+            return await replay(records, client, speed)
+
+    import app as api
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+        return await replay(records, client, speed)
+
+
+def row(name, latencies, rps, errors):
+    return (f"{name:<9} {percentile(latencies, 50):>8.3f} {percentile(latencies, 95):>8.3f} "
+            f"{percentile(latencies, 99):>8.3f} {rps:>8.2f} {errors:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="capture file (.jsonl.gz) from CAPTURE_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="compress the arrival schedule by this factor")
+    parser.add_argument("--upstream-scale", type=float, default=1.0, help="stretch recorded upstream timing")
+    parser.add_argument("--url", help="drive a running API instead of an in-process one")
+    parser.add_argument("--port", type=int, default=0, help="replay server port (set it when using --url)")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    records = load(args.capture)
+    if not records:
+        parser.error("the capture file holds no requests")
+
+    server = ReplayServer(records, scale=args.upstream_scale, port=args.port).start()
+    if args.url:
+        print(f"The API at {args.url} should run with TAVILY_BASE_URL={server.url} OPENAI_BASE_URL={server.url}/v1 "
+              "SEARCH_CACHE_TTL=0 PLAN_CACHE_TTL=0, so every upstream call reaches the replay server")
+    else:
+        point_at_stubs(server)
+        os.environ["CAPTURE_RATE"] = "0"
+
+    span = records[-1]["at"] - records[0]["at"]
+    print(f"{len(records)} captured requests over {span:.1f}s, replayed at {args.speed:g}x")
+    results, elapsed = asyncio.run(drive(records, args.url, args.speed))
+    server.stop()
+
+    recorded = [r["latency"] for r in records if r["status"] < 400]
+    replayed = [t for t, status in results if status is not None and status < 400]
+    errors = sum(status is None or status >= 400 for _, status in results)
+    print(f"{'':<9} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'errors':>6}")
+    print(row("recorded", recorded, len(records) / max(span, 1e-9), len(records) - len(recorded)))
+    print(row("replay", replayed, len(replayed) / elapsed, errors))
+    print("upstream matches: " + "  ".join(f"{how}={n}" for how, n in sorted(server.matches.items())))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "capture": args.capture,
+                "speed": args.speed,
+                "requests": len(records),
+                "recorded": {"p50_s": percentile(recorded, 50), "p95_s": percentile(recorded, 95),
+                             "p99_s": percentile(recorded, 99)},
+                "replay": {"p50_s": percentile(replayed, 50), "p95_s": percentile(replayed, 95),
+                           "p99_s": percentile(replayed, 99), "throughput_rps": len(replayed) / elapsed,
+                           "errors": errors},
+                "matches": dict(server.matches),
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Cold-start benchmark: import time and peak RSS of each entry point.
+
+Reports import time and RSS right after import, then the time to build the
+OpenAI and Tavily clients on first use and RSS after that. Every
+measurement runs in a fresh interpreter, the way a new uvicorn worker
+or autoscaled container starts. `Travel_Agent` is the Streamlit-flavoured
+import path (it pulls in streamlit); `app` and `travel_core` must not.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+probe = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+streamlit_loaded = "streamlit" in sys.modules
+
+import travel_core
+start = time.perf_counter()
+travel_core.llm.get()
+travel_core.tavily_client.get()
+travel_core.knowledge_search.index
+first_use = time.perf_counter() - start
+print(json.dumps({{
+    "import_s": imported,
+    "import_rss_mb": import_rss,
+    "first_use_s": first_use,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "streamlit_loaded": streamlit_loaded,
+}}))
+"""
+
+
+def measure(module, env=None):
+    out = subprocess.run(
+        [sys.executable, "-c", probe.format(module=module)],
+        capture_output=True, text=True, check=True, env=env,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=["travel_core", "app", "Travel_Agent"])
+    args = parser.parse_args()
+
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-bench"),
+           "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY", "tvly-bench")}
+
+    print(f"{'module':<14} {'import (s)':>11} {'RSS (MB)':>9} {'clients (s)':>12} {'RSS (MB)':>9}  streamlit")
+    for module in args.modules:
+        runs = [measure(module, env=env) for _ in range(args.runs)]
+        print(
+            f"{module:<14} {statistics.median(r['import_s'] for r in runs):>11.3f} "
+            f"{statistics.median(r['import_rss_mb'] for r in runs):>9.1f} "
+            f"{statistics.median(r['first_use_s'] for r in runs):>12.3f} "
+            f"{statistics.median(r['rss_mb'] for r in runs):>9.1f}  {runs[0]['streamlit_loaded']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Local stand-ins for the Tavily and OpenAI HTTP APIs.
+
+`StubServer` answers `POST /search` like Tavily and `POST /v1/chat/completions`
+like OpenAI (plain JSON or SSE when `"stream": true`). Latency before the first
+byte, streamed token rate and payload sizes are configurable, and the server
+counts requests and distinct TCP connections so keep-alive reuse is visible.
+
+    python -m benchmarks.stub_servers --port 8900 --search-latency 0.3 --llm-latency 0.5 --tokens-per-second 80
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = "temple market ramen garden museum station hostel onsen street food tour castle river shrine".split()
+
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, search_latency=0.0, llm_latency=0.0,
+                 tokens_per_second=0.0, completion_tokens=300, results_per_query=7, result_chars=800,
+                 min_cached_prefix=1024):
+        self.search_latency = search_latency
+        self.llm_latency = llm_latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.results_per_query = results_per_query
+        self.result_chars = result_chars
+        self.min_cached_prefix = min_cached_prefix
+        self.seen_prefixes = set()
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    def cached_tokens(self, messages):
+        """Mimic OpenAI prefix caching: a repeated system prompt of at least `min_cached_prefix` tokens is cached"""
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        prefix = str(messages[0].get("content", ""))
+        tokens = len(prefix) // 4
+        with self._lock:
+            seen = prefix in self.seen_prefixes
+            self.seen_prefixes.add(prefix)
+        if not seen or tokens < self.min_cached_prefix:
+            return 0
+        return tokens - tokens % 128
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def search_payload(self, query):
+        filler = " ".join(WORDS[i % len(WORDS)] for i in range(self.result_chars // 6))[:self.result_chars]
+        return {
+            "query": query,
+            "results": [
+                {"url": f"https://stub.example/{i}/{'-'.join(query.lower().split())}",
+                 "title": f"{query} #{i}", "content": f"{query}. {filler}", "score": 1 - i / 10}
+                for i in range(self.results_per_query)
+            ],
+        }
+
+    def completion_tokens_list(self):
+        return [("" if i == 0 else " ") + WORDS[i % len(WORDS)] for i in range(self.completion_tokens)]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                stub._count("connections")
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                stub._count("requests")
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path.rstrip("/").endswith("/search"):
+                    time.sleep(stub.search_latency)
+                    self._json(stub.search_payload(request.get("query", "")))
+                elif self.path.rstrip("/").endswith("/chat/completions"):
+                    self._completion(request)
+                else:
+                    self._json({"error": "not found"}, status=404)
+
+            def _completion(self, request):
+                time.sleep(stub.llm_latency)
+                tokens = stub.completion_tokens_list()
+                delay = 1 / stub.tokens_per_second if stub.tokens_per_second else 0.0
+                messages = request.get("messages", [])
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                         "total_tokens": prompt_tokens + len(tokens),
+                         "prompt_tokens_details": {"cached_tokens": stub.cached_tokens(messages)}}
+                base = {"id": "chatcmpl-stub", "created": int(time.time()), "model": request.get("model", "stub")}
+
+                if not request.get("stream"):
+                    time.sleep(delay * len(tokens))
+                    self._json({**base, "object": "chat.completion", "usage": usage, "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+                    ]})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, token in enumerate(tokens):
+                    time.sleep(delay)
+                    delta = {"content": token} if i else {"role": "assistant", "content": token}
+                    chunk = {**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    self._chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                final = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                if request.get("stream_options", {}).get("include_usage"):
+                    self._chunk(f"data: {json.dumps(final)}\n\n".encode())
+                    final = {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+                self._chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+                self._chunk(b"")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=300)
+    parser.add_argument("--results-per-query", type=int, default=7)
+    parser.add_argument("--result-chars", type=int, default=800)
+    parser.add_argument("--min-cached-prefix", type=int, default=1024, help="shortest system prompt that gets cached")
+    args = parser.parse_args()
+
+    server = StubServer(**vars(args))
+    print(f"Stub Tavily:  TAVILY_BASE_URL={server.url}")
+    print(f"Stub OpenAI:  OPENAI_BASE_URL={server.url}/v1")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
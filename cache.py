@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import metrics
+
+
+def normalize_query(query):
+    """Cache key for a search query: case and whitespace folded, the "for a, b" interest list sorted"""
+    query = " ".join(query.lower().split())
+    head, sep, listed = query.rpartition(" for ")
+    if not sep or "," not in listed:
+        return query
+
+    # Sort whole items: "street food, art" and "street art, food" are different searches.
+    items = sorted(part.strip() for part in listed.split(",") if part.strip())
+    return f"{head} for {', '.join(items)}"
+
+
+class DiskCache:
+    """SQLite-backed key/value store with TTL expiry and LRU eviction.
+
+    The database file is shared by every process that points at it, so
+    uvicorn workers and restarts see the same entries. Values must be JSON
+    serializable. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, path, table, ttl=86400, max_entries=5000, name=None):
+        self.path = path
+        self.table = table
+        self.name = name or table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.cache_lookups.labels(self.name, "hit" if hit else "miss").inc()
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or an expired entry"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            row = db.execute(f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._count(hit=False)
+                return None
+            db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+
+        self._count(hit=True)
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            db.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    async def aget(self, key):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key, value):
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self):
+        with closing(self._connect()) as db:
+            entries = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+class CachedSearch:
+    """Puts a DiskCache in front of a search client, keyed by the normalized query"""
+
+    def __init__(self, search, cache):
+        self.search = search
+        self.cache = cache
+
+    def invoke(self, input):
+        key = normalize_query(input["query"])
+        results = self.cache.get(key)
+        if results is None:
+            results = self.search.invoke(input)
+            self.cache.set(key, results)
+        return results
+
+    async def ainvoke(self, input):
+        key = normalize_query(input["query"])
+        results = await self.cache.aget(key)
+        if results is None:
+            results = await self.search.ainvoke(input)
+            await self.cache.aset(key, results)
+        return results
+
+    def peek(self, input):
+        """Cached results for the query, or None; never calls the search client"""
+        return self.cache.get(normalize_query(input["query"]))
+
+    async def apeek(self, input):
+        return await self.cache.aget(normalize_query(input["query"]))
@@ -0,0 +1,230 @@
+"""Sampled capture of API requests together with their upstream exchanges.
+
+With CAPTURE_RATE > 0, `CaptureMiddleware` picks that fraction of the calls to
+the planning endpoints and, for each one, records the request body, the
+response status and latency, and every OpenAI and Tavily exchange made on its
+behalf. The shared HTTP pool (upstream_http.py) hands each exchange to the
+active `Capture`, which keeps its timing: when it started, the time to
+response headers, and when every body chunk arrived, so streamed completions
+keep their token pacing. Request bodies of upstream calls are stored only
+as a hash plus the search query or model name.
+
+Captures are appended as one JSON line per API request to gzip files under
+CAPTURE_PATH, one file per process start. `benchmarks/replay.py` plays them
+back against the API, with the upstreams served from the recording.
+"""
+import asyncio
+import base64
+import codecs
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+import httpx
+
+# /jobs is left out: its graph runs on a background worker, outside the request.
+CAPTURED_PATHS = ("/response", "/response/stream", "/response/batch")
+
+current = contextvars.ContextVar("capture", default=None)
+
+
+def upstream_kind(path):
+    if path.rstrip("/").endswith("/search"):
+        return "search"
+    if path.rstrip("/").endswith("/chat/completions"):
+        return "completion"
+    return "other"
+
+
+def request_key(body):
+    """(hash of the request body, search query or model) used to match a call against a recording"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return hashlib.sha256(body).hexdigest()[:24], ""
+    payload.pop("api_key", None)
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:24]
+    return key, payload.get("query") or payload.get("model") or ""
+
+
+class Capture:
+    """One sampled API request and the upstream exchanges made while serving it"""
+
+    def __init__(self, method, path, query):
+        self.record = {"at": time.time(), "method": method, "path": path, "query": query, "upstream": []}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def exchange(self, request, response, sent):
+        """The exchange record for an upstream response whose headers just arrived; chunks are added as read"""
+        try:
+            key, label = request_key(request.content)
+        except httpx.RequestNotRead:
+            key, label = "", ""
+        exchange = {
+            "host": request.url.host,
+            "kind": upstream_kind(request.url.path),
+            "method": request.method,
+            "path": request.url.path,
+            "key": key,
+            "label": label,
+            "at": round(sent - self.start, 4),
+            "ttfb": round(time.perf_counter() - sent, 4),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", ""),
+            "chunks": [],
+        }
+        encoding = response.headers.get("content-encoding")
+        if encoding:
+            exchange["content_encoding"] = encoding
+        return exchange
+
+    def add(self, exchange):
+        with self._lock:
+            self.record["upstream"].append(exchange)
+
+
+class _Chunks:
+    """Collects body chunks with their arrival time; text when it can, base64 for encoded bodies"""
+
+    def __init__(self, capture, exchange):
+        self.capture = capture
+        self.exchange = exchange
+        self.start = time.perf_counter()
+        self.encoded = "content_encoding" in exchange
+        self.decoder = None if self.encoded else codecs.getincrementaldecoder("utf-8")("replace")
+        self.done = False
+
+    def add(self, chunk):
+        data = base64.b64encode(chunk).decode() if self.encoded else self.decoder.decode(chunk)
+        self.exchange["chunks"].append([round(time.perf_counter() - self.start, 4), data])
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        if self.encoded:
+            self.exchange["body_encoding"] = "base64"
+        self.capture.add(self.exchange)
+
+
+class RecordedStream(httpx.SyncByteStream):
+    def __init__(self, stream, chunks):
+        self.stream = stream
+        self.chunks = chunks
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.chunks.add(chunk)
+            yield chunk
+
+    def close(self):
+        self.stream.close()
+        self.chunks.finish()
+
+
+class AsyncRecordedStream(httpx.AsyncByteStream):
+    def __init__(self, stream, chunks):
+        self.stream = stream
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.chunks.add(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self.stream.aclose()
+        self.chunks.finish()
+
+
+def record(capture, request, response, sent):
+    """Wrap a sync transport response so its exchange lands in `capture` once the body is read"""
+    chunks = _Chunks(capture, capture.exchange(request, response, sent))
+    response.stream = RecordedStream(response.stream, chunks)
+    return response
+
+
+def arecord(capture, request, response, sent):
+    chunks = _Chunks(capture, capture.exchange(request, response, sent))
+    response.stream = AsyncRecordedStream(response.stream, chunks)
+    return response
+
+
+class Recorder:
+    """Appends finished captures to a gzip JSON-lines file"""
+
+    def __init__(self, directory, rate):
+        self.rate = rate
+        name = f"capture-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.jsonl.gz"
+        self.path = os.path.join(directory, name)
+        self.captured = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def sampled(self):
+        return random.random() < self.rate
+
+    def write(self, capture):
+        line = json.dumps(capture.record, separators=(",", ":")) + "\n"
+        with self._lock:
+            # One gzip member per line: the file stays readable if the process dies mid-write.
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self.captured += 1
+
+
+class CaptureMiddleware:
+    """ASGI middleware: samples requests to CAPTURED_PATHS and records them with their upstream calls"""
+
+    def __init__(self, app, recorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in CAPTURED_PATHS or not self.recorder.sampled():
+            return await self.app(scope, receive, send)
+
+        capture = Capture(scope["method"], scope["path"], scope.get("query_string", b"").decode())
+        body = []
+        status = {}
+
+        async def receive_body():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.append(message.get("body", b""))
+            return message
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status["status"] = message["status"]
+                status["ttfb"] = time.perf_counter() - capture.start
+            await send(message)
+
+        token = current.set(capture)
+        try:
+            await self.app(scope, receive_body, send_status)
+        finally:
+            current.reset(token)
+            raw = b"".join(body)
+            try:
+                capture.record["body"] = json.loads(raw) if raw else None
+            except ValueError:
+                capture.record["body"] = raw.decode("utf-8", "replace")
+            capture.record["status"] = status.get("status", 500)
+            capture.record["ttfb"] = round(status.get("ttfb", 0.0), 4)
+            capture.record["latency"] = round(time.perf_counter() - capture.start, 4)
+            await asyncio.to_thread(self.recorder.write, capture)
+
+
+def load(path):
+    """Captured requests from a capture file, in arrival order"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: r["at"])
@@ -0,0 +1,64 @@
+"""A bounded in-memory checkpointer for the Streamlit app.
+
+The app checkpoints each session's runs so a re-plan can reuse the searches
+whose inputs did not change, and it only ever reads a thread's latest state.
+`BoundedMemorySaver` therefore drops a thread's older runs (checkpoints,
+pending writes, channel blobs and subgraph namespaces) when a new run starts
+on it, and keeps at most `max_threads` threads, forgetting the least recently
+used. A plain MemorySaver in a process-wide resource grows with every rerun.
+
+Pruning edits MemorySaver's private `storage`, `writes` and `blobs` dicts, so
+requirements.txt caps langgraph-checkpoint at the versions tests/test_checkpoints.py
+has checked their layout against.
+"""
+import threading
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+
+import config
+
+
+class BoundedMemorySaver(MemorySaver):
+    def __init__(self, max_threads=config.checkpoint_max_threads):
+        super().__init__()
+        self.max_threads = max_threads
+        self._threads = OrderedDict()
+        self._lock = threading.RLock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        namespace = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            if namespace == "" and metadata.get("source") == "input":
+                self._keep_only(thread_id, checkpoint)
+            self._threads[thread_id] = None
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self.max_threads:
+                self.delete_thread(self._threads.popitem(last=False)[0])
+        return saved
+
+    def _keep_only(self, thread_id, checkpoint):
+        """Forget everything of `thread_id` except `checkpoint`, the first of the run that just started"""
+        versions = checkpoint["channel_versions"]
+        namespaces = self.storage.get(thread_id, {})
+        for namespace in list(namespaces):
+            if namespace != "":
+                del namespaces[namespace]
+        root = namespaces.get("", {})
+        for checkpoint_id in [c for c in root if c != checkpoint["id"]]:
+            del root[checkpoint_id]
+        for key in list(self.writes):
+            if key[0] == thread_id and (key[1] != "" or key[2] != checkpoint["id"]):
+                del self.writes[key]
+        for key in list(self.blobs):
+            # Channels the new run did not update still point at blobs written by earlier runs.
+            thread, namespace, channel, version = key
+            if thread == thread_id and (namespace != "" or versions.get(channel) != version):
+                del self.blobs[key]
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._threads.pop(thread_id, None)
@@ -0,0 +1,42 @@
+"""Plan a trip from the command line without Streamlit.
+
+    python cli.py Japan --interests food culture --from 2025-11-01 --to 2025-11-08
+    python cli.py --leg Japan 2025-11-01 2025-11-05 --leg "South Korea" 2025-11-05 2025-11-09
+"""
+import argparse
+
+from itinerary import trip_from_legs
+from travel_core import travel_agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a travel itinerary")
+    parser.add_argument("country", nargs="?", default="")
+    parser.add_argument("--interests", nargs="+", default=["food", "culture"])
+    parser.add_argument("--from", dest="departure_date", default="", help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="return_date", default="", help="YYYY-MM-DD")
+    parser.add_argument("--leg", dest="legs", nargs=3, action="append", default=[],
+                        metavar=("COUNTRY", "FROM", "TO"), help="one leg of a multi-country trip, in order")
+    parser.add_argument("--style", dest="travel_style", default="budget",
+                        choices=["budget", "luxury", "adventure", "relaxation"])
+    parser.add_argument("--trip-type", default="solo", choices=["solo", "friends", "family"])
+    parser.add_argument("--age-group", default="adult", choices=["child", "teen", "adult", "senior"])
+    parser.add_argument("--accommodation", dest="accommodation_type", default="hotel",
+                        choices=["hotel", "hostel", "apartment", "bnb", "camping"])
+    args = parser.parse_args()
+
+    request = vars(args)
+    request["legs"] = [
+        {"country": country, "departure_date": start, "return_date": end} for country, start, end in args.legs
+    ]
+    try:
+        request = trip_from_legs(request)
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = travel_agent.invoke(request)
+    print(result.get("final_trip", ""))
+
+
+if __name__ == "__main__":
+    main()
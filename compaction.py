@@ -0,0 +1,111 @@
+import re
+from functools import lru_cache
+
+from research import format_results
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """Token count for the OpenAI chat models; ~4 chars per token if tiktoken is unavailable"""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text, max_tokens):
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text)[:max_tokens])
+
+
+def _normalize_url(url):
+    url = url.lower().split("#")[0].split("?")[0].rstrip("/")
+    return re.sub(r"^https?://(www\.)?", "", url)
+
+
+def _shingles(text, size=5):
+    words = _WORD.findall(text.lower())
+    if not words:
+        return set()
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+def dedup(results, threshold=0.8):
+    """Drop repeated URLs and snippets whose 5-word shingles mostly overlap an earlier one"""
+    kept, seen_urls, seen_shingles = [], set(), []
+    for r in results:
+        url = r.get("url", "N/A")
+        if url != "N/A":
+            url = _normalize_url(url)
+            if url in seen_urls:
+                continue
+
+        # Results without text have nothing to compare; only their URL can make them repeats.
+        shingles = _shingles(r.get("content", ""))
+        if shingles and any(len(shingles & other) / len(shingles | other) >= threshold for other in seen_shingles):
+            continue
+
+        if url != "N/A":
+            seen_urls.add(url)
+        if shingles:
+            seen_shingles.append(shingles)
+        kept.append(r)
+    return kept
+
+
+def rank(results, state):
+    """Order snippets by how often they mention the traveller's interests, style and lodging"""
+    terms = {w for i in state["interests"] for w in _WORD.findall(i.lower())}
+    terms.update(_WORD.findall(state["travel_style"].lower()))
+    terms.update(_WORD.findall(state["accommodation_type"].lower()))
+
+    def score(r):
+        words = _WORD.findall(r.get("content", "").lower())
+        hits = sum(1 for w in words if w in terms)
+        return hits / (len(words) ** 0.5 or 1) + r.get("score", 0)
+
+    return sorted(results, key=score, reverse=True)
+
+
+def compact_results(results, state, token_budget):
+    """Dedup, rank and cut search results down to `token_budget` prompt tokens.
+
+    Returns the prompt text and a stats dict recording how many tokens the
+    raw results would have cost and how many were saved.
+    """
+    raw_tokens = count_tokens(format_results(results)) if results else 0
+
+    kept, used = [], 0
+    for r in rank(dedup(results), state):
+        block = format_results([r])
+        tokens = count_tokens(block) + 1
+        if used + tokens > token_budget:
+            remaining = token_budget - used
+            if remaining >= 50:
+                kept.append({**r, "content": truncate_tokens(r.get("content", ""), remaining - 20)})
+            break
+        kept.append(r)
+        used += tokens
+
+    text = format_results(kept)
+    context_tokens = count_tokens(text) if kept else 0
+    stats = {
+        "results_in": len(results),
+        "results_kept": len(kept),
+        "raw_tokens": raw_tokens,
+        "context_tokens": context_tokens,
+        "tokens_saved": max(0, raw_tokens - context_tokens),
+    }
+    return text, stats
@@ -0,0 +1,67 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+openai_model = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
+fast_model = os.getenv("FAST_MODEL", openai_model)
+strong_model = os.getenv("STRONG_MODEL", "gpt-4o-mini")
+route_fast_max_nights = int(os.getenv("ROUTE_FAST_MAX_NIGHTS", "4"))
+route_fast_max_interests = int(os.getenv("ROUTE_FAST_MAX_INTERESTS", "3"))
+route_fast_styles = os.getenv("ROUTE_FAST_STYLES", "budget,relaxation").split(",")
+llm_fallback = os.getenv("LLM_FALLBACK", "1") not in ("0", "false", "False")
+llm_fallback_timeout = float(os.getenv("LLM_FALLBACK_TIMEOUT", "0"))
+search_max_results = int(os.getenv("SEARCH_MAX_RESULTS", "7"))
+search_timeout = float(os.getenv("SEARCH_TIMEOUT", "10"))
+context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+long_trip_nights = int(os.getenv("LONG_TRIP_NIGHTS", "7"))
+chunk_days = int(os.getenv("CHUNK_DAYS", "3"))
+prefetch_delay = float(os.getenv("PREFETCH_DELAY", "1.5"))
+prefetch_max_wasted = int(os.getenv("PREFETCH_MAX_WASTED", "6"))
+checkpoint_max_threads = int(os.getenv("CHECKPOINT_MAX_THREADS", "256"))
+
+cache_path = os.getenv("CACHE_PATH", ".cache/travel_agent.sqlite")
+search_cache_ttl = float(os.getenv("SEARCH_CACHE_TTL", "86400"))
+search_cache_max_entries = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+plan_cache_ttl = float(os.getenv("PLAN_CACHE_TTL", "3600"))
+plan_cache_max_entries = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1000"))
+plan_cache_control = os.getenv("PLAN_CACHE_CONTROL", f"public, max-age={int(plan_cache_ttl)}")
+compress_min_size = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+gzip_level = int(os.getenv("GZIP_LEVEL", "6"))
+brotli_quality = int(os.getenv("BROTLI_QUALITY", "5"))
+knowledge_index_path = os.getenv("KNOWLEDGE_INDEX_PATH", ".cache/knowledge")
+knowledge_index_max_age = float(os.getenv("KNOWLEDGE_INDEX_MAX_AGE", str(7 * 86400)))
+
+max_inflight_plans = int(os.getenv("MAX_INFLIGHT_PLANS", "32"))
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+http_max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+http_max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+http_keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+http2 = os.getenv("HTTP2", "1") not in ("0", "false", "False")
+openai_connect_timeout = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+openai_read_timeout = float(os.getenv("OPENAI_READ_TIMEOUT", "60"))
+tavily_connect_timeout = float(os.getenv("TAVILY_CONNECT_TIMEOUT", "5"))
+tavily_read_timeout = float(os.getenv("TAVILY_READ_TIMEOUT", "8"))
+tavily_base_url = os.getenv("TAVILY_BASE_URL", "https://api.tavily.com")
+
+admission_queue_size = int(os.getenv("ADMISSION_QUEUE_SIZE", "100"))
+degrade_queue_thresholds = [float(t) for t in os.getenv("DEGRADE_QUEUE_THRESHOLDS", "0.1,0.25,0.5,0.75").split(",") if t]
+degrade_latency_thresholds = [float(t) for t in os.getenv("DEGRADE_LATENCY_THRESHOLDS", "20,30,45,60").split(",") if t]
+degrade_max_results = int(os.getenv("DEGRADE_MAX_RESULTS", "3"))
+openai_requests_per_second = float(os.getenv("OPENAI_REQUESTS_PER_SECOND", "0"))
+openai_tokens_per_minute = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0"))
+openai_max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+completion_token_estimate = int(os.getenv("COMPLETION_TOKEN_ESTIMATE", "700"))
+tavily_requests_per_second = float(os.getenv("TAVILY_REQUESTS_PER_SECOND", "0"))
+
+job_workers = int(os.getenv("JOB_WORKERS", "4"))
+job_lease = float(os.getenv("JOB_LEASE", "60"))
+job_ttl = float(os.getenv("JOB_TTL", "86400"))
+
+admin_token = os.getenv("ADMIN_TOKEN", "")
+profile_interval = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+profile_dir = os.getenv("PROFILE_DIR", ".cache/profiles")
+capture_rate = float(os.getenv("CAPTURE_RATE", "0"))
+capture_path = os.getenv("CAPTURE_PATH", ".cache/captures")
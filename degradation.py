@@ -0,0 +1,80 @@
+"""Load-aware degradation of the research step.
+
+Under load the graph gives up research depth for latency, in this order:
+
+    0 full            every query, all results, the full context budget
+    1 fewer_results   at most DEGRADE_MAX_RESULTS results per query, half the context budget
+    2 single_query    only the activities query
+    3 stored_only     no network: checkpointed, cached or indexed research only
+    4 no_research     plan from the preferences alone
+
+`DegradationPolicy.level()` maps the current load (how full the admission
+queue is, and the moving average plan latency) to a level through the
+configured thresholds. The API passes the level into the graph as the
+`degradation` state field and reports it with each response.
+"""
+import config
+from research import normalize_results, query_kind
+
+LEVELS = ("full", "fewer_results", "single_query", "stored_only", "no_research")
+FULL, FEWER_RESULTS, SINGLE_QUERY, STORED_ONLY, NO_RESEARCH = range(len(LEVELS))
+
+
+def _crossed(value, thresholds):
+    return min(sum(value >= t for t in thresholds), NO_RESEARCH)
+
+
+class DegradationPolicy:
+    """`load()` returns (queue fill 0..1, average plan latency in seconds); each threshold crossed is one level"""
+
+    def __init__(self, load, queue_thresholds=config.degrade_queue_thresholds,
+                 latency_thresholds=config.degrade_latency_thresholds):
+        self.load = load
+        self.queue_thresholds = sorted(queue_thresholds)
+        self.latency_thresholds = sorted(latency_thresholds)
+
+    def level(self):
+        queue_fill, latency = self.load()
+        return max(_crossed(queue_fill, self.queue_thresholds), _crossed(latency, self.latency_thresholds))
+
+
+def select_queries(queries, level):
+    if level < SINGLE_QUERY:
+        return queries
+    activities = [q for q in queries if query_kind(q) == "activities"]
+    return (activities or queries)[:1]
+
+
+def trim_research(research, level, max_results=config.degrade_max_results):
+    if level < FEWER_RESULTS:
+        return research
+    return {query: results[:max_results] for query, results in research.items()}
+
+
+def context_budget(token_budget, level):
+    return token_budget if level < FEWER_RESULTS else token_budget // 2
+
+
+def stored_research(search, queries):
+    """{query: results} for the queries `search` can answer without the network (its `peek`)"""
+    peek = getattr(search, "peek", None)
+    if peek is None:
+        return {}
+    found = {}
+    for query in queries:
+        results = peek({"query": query})
+        if results is not None:
+            found[query] = normalize_results(results)
+    return found
+
+
+async def astored_research(search, queries):
+    apeek = getattr(search, "apeek", None)
+    if apeek is None:
+        return {}
+    found = {}
+    for query in queries:
+        results = await apeek({"query": query})
+        if results is not None:
+            found[query] = normalize_results(results)
+    return found
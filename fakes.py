@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeSearch:
+    """Local stand-in for TavilySearch that waits before answering.
+
+    `delays` maps a query substring to the seconds that query should take;
+    anything unmatched waits `default_delay`.
+    """
+
+    def __init__(self, delays=None, default_delay=0.0, results_per_query=3):
+        self.delays = delays or {}
+        self.default_delay = default_delay
+        self.results_per_query = results_per_query
+        self.calls = 0
+
+    def _delay(self, query):
+        for fragment, delay in self.delays.items():
+            if fragment in query:
+                return delay
+        return self.default_delay
+
+    def _results(self, query):
+        slug = "-".join(query.lower().split())
+        return {
+            "query": query,
+            "results": [
+                {"url": f"https://example.com/{slug}/{i}", "content": f"Result {i} for {query}"}
+                for i in range(self.results_per_query)
+            ],
+        }
+
+    def invoke(self, input):
+        self.calls += 1
+        time.sleep(self._delay(input["query"]))
+        return self._results(input["query"])
+
+    async def ainvoke(self, input):
+        self.calls += 1
+        await asyncio.sleep(self._delay(input["query"]))
+        return self._results(input["query"])
+
+
+class FakeChatModel(BaseChatModel):
+    """Local stand-in for ChatOpenAI: waits `latency`, then emits `reply` word by word."""
+
+    reply: str = "Day 1: Arrive and explore the old town. Day 2: Food tour and a museum visit."
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _tokens(self):
+        words = self.reply.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _token_delay(self):
+        return 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _usage(self, messages):
+        # Rough 4-characters-per-token estimate, enough for the token accounting to have numbers.
+        prompt = sum(len(str(m.content)) for m in messages) // 4
+        completion = len(self._tokens())
+        return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+    def _result(self, messages):
+        message = AIMessage(content=self.reply, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _last_chunk(self, messages):
+        return ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency + self._token_delay() * len(self._tokens()))
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency + self._token_delay() * len(self._tokens()))
+        return self._result(messages)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for token in self._tokens():
+            time.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield self._last_chunk(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for token in self._tokens():
+            await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield self._last_chunk(messages)
@@ -0,0 +1,86 @@
+"""ETags, conditional requests, Cache-Control and compression for JSON responses.
+
+A plan's ETag is a hash of its canonical request key (plan_cache.plan_key) and
+the response body, so every worker computes the same tag for the same plan and
+clients or a CDN can revalidate with If-None-Match and get a bodyless 304.
+Only GET and HEAD are answered with 304 (RFC 9110 15.4.5); a POST carrying
+If-None-Match gets the full response with its ETag.
+Bodies are brotli-compressed when the client accepts it and the optional
+`brotli` package is installed, otherwise gzip. The tags are weak (W/) because
+the same plan can be sent with different encodings.
+"""
+import gzip
+import hashlib
+import json
+from functools import lru_cache
+
+from fastapi import Response
+
+import config
+
+
+@lru_cache(maxsize=1)
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def etag(key, body):
+    return 'W/"' + hashlib.sha256(key.encode() + b"\n" + body).hexdigest()[:32] + '"'
+
+
+def not_modified(if_none_match, tag):
+    """True if an If-None-Match header value matches `tag` (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return tag.removeprefix("W/") in {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+
+
+def _accepted(accept_encoding):
+    codings = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(coding.strip().lower())
+    return codings
+
+
+def encode(body, accept_encoding):
+    """(body, Content-Encoding or None) for the best coding the client accepts"""
+    if len(body) < config.compress_min_size:
+        return body, None
+    accepted = _accepted(accept_encoding)
+    brotli = _brotli()
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return brotli.compress(body, quality=config.brotli_quality), "br"
+    if "gzip" in accepted or "*" in accepted:
+        return gzip.compress(body, compresslevel=config.gzip_level), "gzip"
+    return body, None
+
+
+def json_response(request, payload, key=None, headers=None):
+    """JSON response, compressed when worthwhile; with a `key` it also gets an ETag and Cache-Control"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    headers = {"Vary": "Accept-Encoding", **(headers or {})}
+    if key is not None:
+        headers["ETag"] = etag(key, body)
+        headers["Cache-Control"] = config.plan_cache_control
+        conditional = request.method in ("GET", "HEAD")
+        if conditional and not_modified(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    body, coding = encode(body, request.headers.get("accept-encoding"))
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,173 @@
+"""Map-reduce planning for long and multi-leg trips.
+
+`outline` splits the trip into an overview section (stays and booking links)
+and day ranges of `chunk_days`, handing each section its own slice of the
+research so the sections can be written concurrently without repeating the
+same places; `merge` stitches the written sections back together in order.
+`SectionStream` does the same for a client reading the itinerary as it is
+written: it releases the sections' text in order while they are written
+concurrently.
+
+A multi-leg trip (an ordered list of countries with their own dates) is split
+by `leg_outline` into a route overview plus one section per leg; each leg is
+researched and planned as its own single-destination trip (`leg_state`). A long
+leg goes through `outline` like a long trip, with its days numbered from the
+day of the whole trip the leg starts on.
+"""
+from datetime import date, timedelta
+
+from compaction import compact_results, dedup, rank
+from research import query_kind
+
+SEPARATOR = "\n\n---\n\n"
+
+
+def trip_days(state):
+    """Number of calendar days in the trip, or 0 if the dates can't be parsed"""
+    try:
+        start = date.fromisoformat(state["departure_date"])
+        end = date.fromisoformat(state["return_date"])
+    except (KeyError, TypeError, ValueError):
+        return 0
+    return max(0, (end - start).days + 1)
+
+
+def day_number(state, day):
+    """1-based day of the trip that the ISO date `day` falls on, or 1 if the dates can't be parsed"""
+    try:
+        return max(1, (date.fromisoformat(day) - date.fromisoformat(state["departure_date"])).days + 1)
+    except (KeyError, TypeError, ValueError):
+        return 1
+
+
+def trip_nights(state):
+    """Number of nights away (a Saturday-to-Saturday week is 7), or 0 if the dates can't be parsed"""
+    return max(0, trip_days(state) - 1)
+
+
+def day_ranges(state, chunk_days):
+    """[(first_day, last_day, first_date, last_date)] covering the whole trip"""
+    start, days = date.fromisoformat(state["departure_date"]), trip_days(state)
+    ranges = []
+    for first in range(1, days + 1, chunk_days):
+        last = min(first + chunk_days - 1, days)
+        ranges.append((first, last, start + timedelta(first - 1), start + timedelta(last - 1)))
+    return ranges
+
+
+def outline(state, chunk_days, token_budget):
+    """Section specs for the map step: index 0 is the overview, then one per day range"""
+    leg = state.get("leg")
+    offset = leg["first_day"] - 1 if leg else 0
+    research = state.get("research", {})
+    lodging = [r for query, results in research.items() if query_kind(query) == "lodging" for r in results]
+    places = rank(dedup(
+        [r for query, results in research.items() if query_kind(query) != "lodging" for r in results]
+    ), state)
+
+    sections = [{"index": 0, "kind": "overview", "search_results": compact_results(lodging, state, token_budget)[0]}]
+    ranges = day_ranges(state, chunk_days)
+    for i, (first, last, first_date, last_date) in enumerate(ranges):
+        # Round-robin over the ranked places so each range gets different, equally good picks.
+        sections.append({
+            "index": i + 1,
+            "kind": "days",
+            "first_day": first + offset,
+            "last_day": last + offset,
+            "start_date": first_date.isoformat(),
+            "end_date": last_date.isoformat(),
+            "search_results": compact_results(places[i::len(ranges)], state, token_budget)[0],
+        })
+    return sections
+
+
+def merge(sections):
+    return SEPARATOR.join(s["text"] for s in sorted(sections, key=lambda s: s["index"]))
+
+
+class SectionStream:
+    """The merged itinerary as a text stream, from sections written concurrently.
+
+    Feed it each section's tokens as they arrive (`token`) and each finished
+    section (`done`); both return the text that extends the merged itinerary
+    now. The lowest unfinished section streams live, later ones are held back
+    until every section before them is done.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._next = 0
+        self._started = False
+        self._sent = 0
+        self._tokens = {}
+        self._finished = {}
+
+    def token(self, index, text):
+        self._tokens[index] = self._tokens.get(index, "") + text
+        return self._flush()
+
+    def done(self, index, text):
+        self._finished[index] = text
+        return self._flush()
+
+    def _flush(self):
+        out = []
+        while True:
+            finished = self._next in self._finished
+            text = self._finished[self._next] if finished else self._tokens.get(self._next, "")
+            if not self._started and (text or finished):
+                self._started = True
+                if self._next > 0:
+                    out.append(SEPARATOR)
+            out.append(text[self._sent:])
+            self._sent = max(self._sent, len(text))
+            if not finished:
+                break
+            self._next, self._started, self._sent = self._next + 1, False, 0
+        chunk = "".join(out)
+        self.text += chunk
+        return chunk
+
+
+def trip_from_legs(request):
+    """Fill the trip-wide country and dates of a multi-leg request from its ordered legs"""
+    legs = request.get("legs") or []
+    if legs:
+        request = {
+            **request,
+            "country": " → ".join(leg["country"] for leg in legs),
+            "departure_date": legs[0]["departure_date"],
+            "return_date": legs[-1]["return_date"],
+        }
+    if not request.get("country") or not request.get("departure_date") or not request.get("return_date"):
+        raise ValueError("Give country, departure_date and return_date, or a list of legs")
+    return request
+
+
+def leg_outline(state):
+    """Section specs for a multi-leg trip: index 0 is the route overview, then one per leg"""
+    legs = state["legs"]
+    sections = [{"index": 0, "kind": "route", "route": state["country"], "search_results": "No search results available."}]
+    for i, leg in enumerate(legs):
+        sections.append({
+            "index": i + 1,
+            "kind": "leg",
+            "number": i + 1,
+            "count": len(legs),
+            "country": leg["country"],
+            "first_day": day_number(state, leg["departure_date"]),
+            "start_date": leg["departure_date"],
+            "end_date": leg["return_date"],
+        })
+    return sections
+
+
+def leg_state(state, section):
+    """Input for planning one leg as a single-destination trip; research from earlier runs is passed on for reuse"""
+    return {
+        **{k: v for k, v in state.items() if k not in ("legs", "outline", "sections", "token_usage")},
+        "country": section["country"],
+        "departure_date": section["start_date"],
+        "return_date": section["end_date"],
+        "leg": section,
+    }
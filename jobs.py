@@ -0,0 +1,163 @@
+"""Submit-now, fetch-later trip jobs backed by SQLite.
+
+`JobStore` keeps every job (request, status, result) on disk so a restart or a
+crashed worker loses nothing: running jobs hold a lease that they renew while
+working, and any job whose lease ran out goes back to the queue. `JobRunner`
+is a pool of asyncio workers inside an API process that claims queued jobs
+and runs them through the given `plan` coroutine.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobStore:
+    def __init__(self, path, lease=60.0, ttl=86400.0, max_attempts=3):
+        self.path = path
+        self.lease = lease
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, result TEXT, error TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def submit(self, request):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, request, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), now, now),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT id, status, result, error, attempts, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "status", "final_result", "error", "attempts", "created", "updated")
+        return {k: v for k, v in zip(keys, row) if v is not None}
+
+    def claim(self):
+        """Atomically move the oldest queued (or lease-expired) job to running and return it"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                    "error = CASE WHEN attempts >= ? THEN 'worker lost too many times' ELSE error END, updated = ? "
+                    "WHERE status = ? AND updated < ?",
+                    (self.max_attempts, FAILED, QUEUED, self.max_attempts, now, RUNNING, now - self.lease),
+                )
+                row = db.execute(
+                    "SELECT id, request FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                        (RUNNING, now, row[0]),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def heartbeat(self, job_id):
+        with closing(self._connect()) as db:
+            db.execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+    def finish(self, job_id, result=None, error=None):
+        with closing(self._connect()) as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? WHERE id = ?",
+                (FAILED if error is not None else DONE, result, error, time.time(), job_id),
+            )
+
+    def purge(self):
+        """Forget finished jobs older than the TTL"""
+        with closing(self._connect()) as db:
+            db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?", (DONE, FAILED, time.time() - self.ttl))
+
+    def counts(self):
+        with closing(self._connect()) as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobRunner:
+    """`workers` asyncio tasks that claim jobs from a JobStore and run plan(request)"""
+
+    def __init__(self, store, plan, workers=4, poll_interval=1.0):
+        self.store = store
+        self.plan = plan
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = None
+        self._tasks = []
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def notify(self):
+        """Wake idle workers right away instead of at their next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            await asyncio.to_thread(self.store.heartbeat, job_id)
+
+    async def _work(self):
+        polls = 0
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                polls += 1
+                if polls % 600 == 0:
+                    await asyncio.to_thread(self.store.purge)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, request = job
+            heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+            try:
+                result = await self.plan(request)
+                await asyncio.to_thread(self.store.finish, job_id, result=result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self.store.finish, job_id, error=str(e))
+            finally:
+                heartbeat.cancel()
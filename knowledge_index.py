@@ -0,0 +1,340 @@
+"""Precomputed destination research, served from a memory-mapped BM25 index.
+
+`build` prefetches the research queries for popular country x travel_style x
+accommodation_type x interest combinations and writes a compact on-disk index:
+
+    meta.json      built_at, document count, average length, countries
+    queries.json   normalized query -> fetch time and document ids
+    terms.json     term -> [offset, document frequency] into postings.bin
+    postings.bin   uint32 (doc id, term frequency) pairs
+    docs.bin       UTF-8 JSON result records, addressed by offsets.bin (uint64)
+    doclens.bin    uint32 document lengths for BM25
+
+`KnowledgeIndex` memory-maps the binary files, so opening it is cheap and the
+pages are shared between workers. A rebuild writes a fresh directory and swaps
+it in, so running workers keep reading the old files until they notice the new
+meta.json and reopen. `IndexedSearch` answers research queries from
+the index while it is fresh enough and only goes to the network on a miss; if
+the network call fails it falls back to the best lexical matches in the index.
+
+    python -m knowledge_index build --countries Japan Italy Thailand --out .cache/knowledge
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from array import array
+from collections import Counter, defaultdict
+
+import metrics
+from cache import normalize_query
+from research import build_queries, normalize_results, query_kind
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STYLES = ["budget", "luxury", "adventure", "relaxation"]
+ACCOMMODATIONS = ["hotel", "hostel", "apartment", "bnb", "camping"]
+INTERESTS = ["food", "culture", "nature", "nightlife", "adventure", "history", "shopping", "beaches", "mountains"]
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+def popular_queries(countries, styles=STYLES, accommodations=ACCOMMODATIONS, interests=INTERESTS, year=None):
+    """Every distinct research query build_queries issues for the given combinations"""
+    year = str(year or time.strftime("%Y"))
+    queries = {}
+    interest_sets = [[i] for i in interests] + [list(pair) for pair in itertools.combinations(interests, 2)]
+    for country, style, accommodation, chosen in itertools.product(countries, styles, accommodations, interest_sets):
+        state = {
+            "country": country,
+            "travel_style": style,
+            "accommodation_type": accommodation,
+            "interests": chosen,
+            "departure_date": f"{year}-01-01",
+        }
+        for query in build_queries(state):
+            queries.setdefault(normalize_query(query), (query, country))
+    return list(queries.values())
+
+
+def write_index(path, fetched):
+    """Write an index from [(query, country, fetched_at, results)], replacing any index at `path`.
+
+    Workers may have the old files memory-mapped, and truncating a mapped file
+    kills them with SIGBUS, so the new index goes into a temporary directory
+    next to `path` and is renamed into place; the old files are only unlinked.
+    """
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(path) + ".", dir=os.path.dirname(path))
+    try:
+        _write_files(tmp, fetched)
+        if os.path.exists(path):
+            old = tmp + ".old"
+            os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _write_files(path, fetched):
+    docs, doc_ids, queries = [], {}, {}
+    for query, country, fetched_at, results in fetched:
+        ids = []
+        for r in results:
+            key = (r.get("url", "N/A"), r.get("content", ""))
+            if key not in doc_ids:
+                doc_ids[key] = len(docs)
+                docs.append({"url": key[0], "content": key[1], "title": r.get("title", ""), "country": country})
+            ids.append(doc_ids[key])
+        queries[normalize_query(query)] = {"fetched_at": fetched_at, "docs": ids}
+
+    postings = defaultdict(list)
+    doclens = array("I")
+    offsets = array("Q")
+    with open(os.path.join(path, "docs.bin"), "wb") as f:
+        for doc_id, doc in enumerate(docs):
+            offsets.append(f.tell())
+            f.write(json.dumps(doc).encode())
+            words = tokenize(doc["content"])
+            doclens.append(len(words))
+            for term, tf in Counter(words).items():
+                postings[term].append((doc_id, tf))
+        offsets.append(f.tell())
+
+    terms, flat = {}, array("I")
+    for term, entries in sorted(postings.items()):
+        terms[term] = [len(flat) // 2, len(entries)]
+        for doc_id, tf in entries:
+            flat.extend((doc_id, tf))
+
+    for name, data in (("offsets.bin", offsets), ("doclens.bin", doclens), ("postings.bin", flat)):
+        with open(os.path.join(path, name), "wb") as f:
+            data.tofile(f)
+    for name, data in (("terms.json", terms), ("queries.json", queries)):
+        with open(os.path.join(path, name), "w") as f:
+            json.dump(data, f)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({
+            "built_at": time.time(),
+            "documents": len(docs),
+            "avgdl": sum(doclens) / len(doclens) if doclens else 0.0,
+            "countries": sorted({country for _, country, _, _ in fetched}),
+        }, f)
+
+
+def _map(path, typecode):
+    if os.path.getsize(path) == 0:
+        return memoryview(array(typecode))
+    with open(path, "rb") as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+
+
+class KnowledgeIndex:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "queries.json")) as f:
+            self.queries = json.load(f)
+        with open(os.path.join(path, "terms.json")) as f:
+            self.terms = json.load(f)
+        with open(os.path.join(path, "docs.bin"), "rb") as f:
+            self.docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(f.name) else b""
+        self.offsets = _map(os.path.join(path, "offsets.bin"), "Q")
+        self.doclens = _map(os.path.join(path, "doclens.bin"), "I")
+        self.postings = _map(os.path.join(path, "postings.bin"), "I")
+        self.countries = {c.lower(): c for c in self.meta["countries"]}
+
+    @classmethod
+    def open(cls, path):
+        """Load the index at `path`, or return None if there is none"""
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        return cls(path)
+
+    def doc(self, doc_id):
+        return json.loads(self.docs[self.offsets[doc_id]:self.offsets[doc_id + 1]])
+
+    def lookup(self, query, max_age):
+        """Stored results for exactly this (normalized) query if fetched within `max_age` seconds"""
+        entry = self.queries.get(normalize_query(query))
+        if entry is None or time.time() - entry["fetched_at"] > max_age:
+            return None
+        return [self.doc(doc_id) for doc_id in entry["docs"]]
+
+    def search(self, query, k=7, k1=1.2, b=0.75):
+        """BM25 over all documents, restricted to the country named in the query if known"""
+        text = query.lower()
+        country = next((c for key, c in self.countries.items() if key in text), None)
+        if country is None and query_kind(query) != "other":
+            # A research query always names its country; other countries' documents are no answer for it.
+            return []
+        n, avgdl = self.meta["documents"], self.meta["avgdl"] or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            if term not in self.terms:
+                continue
+            start, df = self.terms[term]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for i in range(start, start + df):
+                doc_id, tf = self.postings[2 * i], self.postings[2 * i + 1]
+                norm = tf + k1 * (1 - b + b * self.doclens[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (k1 + 1) / norm
+
+        results = []
+        for doc_id, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            doc = self.doc(doc_id)
+            if country is None or doc["country"] == country:
+                results.append(doc)
+                if len(results) == k:
+                    break
+        return results
+
+
+class IndexedSearch:
+    """Answers queries from a KnowledgeIndex when fresh, else from `search`; falls back to the index on errors"""
+
+    def __init__(self, search, path, max_age):
+        self.search = search
+        self.path = path
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self._index = None
+        self._version = None
+
+    @property
+    def index(self):
+        """The index at `path`, reopened whenever a rebuild has swapped in a new one"""
+        try:
+            stat = os.stat(os.path.join(self.path, "meta.json"))
+            version = (stat.st_ino, stat.st_mtime_ns)
+            if version != self._version:
+                self._index = KnowledgeIndex(self.path)
+                self._version = version
+        except FileNotFoundError:
+            # Absent, or swapped out while opening: keep serving what is already open.
+            pass
+        return self._index
+
+    def _hit(self, query):
+        if self.index is None:
+            return None
+        results = self.index.lookup(query, self.max_age)
+        if results is None:
+            self.misses += 1
+            metrics.cache_lookups.labels("knowledge", "miss").inc()
+            return None
+        self.hits += 1
+        metrics.cache_lookups.labels("knowledge", "hit").inc()
+        return {"query": query, "results": results}
+
+    def _fallback(self, query, error):
+        results = self.index.search(query) if self.index is not None else []
+        if not results:
+            raise error
+        self.fallbacks += 1
+        return {"query": query, "results": results, "degraded": True}
+
+    def invoke(self, input):
+        hit = self._hit(input["query"])
+        if hit is not None:
+            return hit
+        try:
+            return self.search.invoke(input)
+        except Exception as e:
+            return self._fallback(input["query"], e)
+
+    async def ainvoke(self, input):
+        hit = self._hit(input["query"])
+        if hit is not None:
+            return hit
+        try:
+            return await self.search.ainvoke(input)
+        except Exception as e:
+            return self._fallback(input["query"], e)
+
+    def _stored(self, query, max_age):
+        results = self.index.lookup(query, max_age) if self.index is not None else None
+        return None if results is None else {"query": query, "results": results}
+
+    def peek(self, input, max_age=float("inf")):
+        """Cached or indexed results without touching the network, or None; indexed ones at most `max_age` old"""
+        peek = getattr(self.search, "peek", None)
+        results = peek(input) if peek is not None else None
+        return results if results is not None else self._stored(input["query"], max_age)
+
+    async def apeek(self, input, max_age=float("inf")):
+        apeek = getattr(self.search, "apeek", None)
+        results = await apeek(input) if apeek is not None else None
+        return results if results is not None else self._stored(input["query"], max_age)
+
+    def stats(self):
+        return {
+            "loaded": self.index is not None,
+            "built_at": self.index.meta["built_at"] if self.index is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fallbacks": self.fallbacks,
+        }
+
+
+async def fetch_all(search, queries, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+    fetched = []
+
+    async def fetch(query, country):
+        async with slots:
+            try:
+                results = normalize_results(await search.ainvoke({"query": query}))
+            except Exception as e:
+                print(f"Search error for '{query}': {e}")
+                return
+        fetched.append((query, country, time.time(), results))
+        if len(fetched) % 50 == 0:
+            print(f"{len(fetched)}/{len(queries)} queries fetched")
+
+    await asyncio.gather(*(fetch(query, country) for query, country in queries))
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local destination knowledge index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--countries", nargs="+", required=True)
+    build.add_argument("--styles", nargs="+", default=STYLES)
+    build.add_argument("--accommodations", nargs="+", default=ACCOMMODATIONS)
+    build.add_argument("--interests", nargs="+", default=INTERESTS)
+    build.add_argument("--year", help="departure year used in the interest queries (default: this year)")
+    build.add_argument("--concurrency", type=int, default=8)
+    build.add_argument("--out", default=None, help="index directory (default KNOWLEDGE_INDEX_PATH)")
+    args = parser.parse_args()
+
+    import config
+    from travel_core import make_search
+
+    queries = popular_queries(args.countries, args.styles, args.accommodations, args.interests, args.year)
+    print(f"Prefetching {len(queries)} queries")
+    fetched = asyncio.run(fetch_all(make_search(), queries, args.concurrency))
+    out = args.out or config.knowledge_index_path
+    write_index(out, fetched)
+    print(f"Wrote {len(fetched)} queries to {out}")
+
+
+if __name__ == "__main__":
+    main()
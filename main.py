@@ -1,17 +1,21 @@
 import streamlit as st
 from datetime import datetime, timedelta
 import json
-from langgraph.graph import StateGraph, START, END
-from typing import TypedDict, Literal
-from langchain_openai import ChatOpenAI
-from langchain_tavily import TavilySearch
-from dotenv import load_dotenv
+import os
+import uuid
 
-load_dotenv()
-groq_key = st.secrets["GROQ_API_KEY"]
-google_key = st.secrets["GOOGLE_API_KEY"]
-openai_key = st.secrets["OPENAI_API_KEY"]
-tavily_key = st.secrets["TAVILY_API_KEY"]
+# Streamlit Cloud keeps the API keys in st.secrets; the core reads them from the environment.
+try:
+    for key in ("OPENAI_API_KEY", "TAVILY_API_KEY"):
+        if key in st.secrets:
+            os.environ.setdefault(key, st.secrets[key])
+except Exception:
+    pass
+
+from travel_core import build_travel_agent, router, tavily_search, plan_cache, search_timeout
+from checkpoints import BoundedMemorySaver
+from prefetch import Prefetcher
+from research import build_queries
 
 
 # Page config
@@ -78,119 +82,29 @@ st.markdown("""
 @st.cache_resource
 def init_travel_agent():
     """Initialize the travel agent graph"""
-    llm = ChatOpenAI(model="gpt-4o-mini", streaming=True)
-    tavily_search = TavilySearch(max_results=7)
-
-    class Travel_Agent(TypedDict):
-        final_trip: str
-        country: str
-        interests: list[str]
-        departure_date: str
-        return_date: str
-        travel_style: Literal["budget", "luxury", "adventure", "relaxation"]
-        trip_type: Literal["solo", "friends", "family"]
-        age_group: Literal["child", "teen", "adult", "senior"]
-        accommodation_type: Literal["hotel", "hostel", "apartment", "bnb", "camping"]
-        search_results: str
-
-    def research_node(state: Travel_Agent):
-        """Search for current travel information about the destination"""
-        queries = [
-            f"best {state['travel_style']} {state['accommodation_type']} in {state['country']} 2025",
-            f"top things to do in {state['country']} for {', '.join(state['interests'][:2])}",
-        ]
-
-        if len(state['interests']) > 0:
-            queries.append(f"{state['country']} {state['interests'][0]} recommendations {state['departure_date'][:4]}")
-
-        all_results = []
-
-        for query in queries:
-            try:
-                results = tavily_search.invoke({"query": query})
-                if isinstance(results, str):
-                    try:
-                        results = json.loads(results)
-                        if isinstance(results, dict):
-                            results = [results]
-                    except Exception:
-                        results = [{"url": "N/A", "content": results}]
-                all_results.extend(results)
-            except Exception as e:
-                print(f"Search error for '{query}': {e}")
-
-        formatted_results = "\n\n".join([
-            f"Source: {r.get('url', 'N/A')}\n{r.get('content', '')}"
-            for r in all_results if isinstance(r, dict)
-        ])
-
-        return {"search_results": formatted_results or "No search results found."}
-
-    travel_prompt = """
-You are an expert luxury travel agent who crafts visually appealing, informative, and emotionally engaging travel itineraries.
-Your job is to generate balanced, accurate, and visually polished travel outputs based on the following user inputs and REAL-TIME SEARCH DATA.
-
-**IMPORTANT**: Use the search results below to provide current, accurate recommendations for hotels, restaurants, activities, and attractions.
-Reference specific places, recent reviews, and up-to-date information from the search results.
-
-Avoid long blocks of text.
-Use emojis, headers, and short descriptive sections — like a premium travel brochure.
-Tone should feel high-end, warm, and vibrant — not robotic or overly formal.
-
-Each response should feel crafted and personalized to the traveler's style and interests.
-
-Add good enough details to make the itinerary actionable, but keep it concise (300-400 words).
-
-At the end try to return links for flights and accommodation booking sites and and other things if possible or related to the output all recommendations should be based on the search results provided.
-
----
-
-**User Preferences:**
-
-🌍 Destination: {country}
-📅 Dates: {departure_date} to {return_date}
-✨ Style: {travel_style}
-👥 Trip Type: {trip_type}
-👤 Age Group: {age_group}
-🏨 Accommodation: {accommodation_type}
-💫 Interests: {interests}
-
----
-
-**Current Travel Information (Use this data):**
-
-{search_results}
-
----
-
-Now create a personalized itinerary incorporating the above real-time information.
-"""
-
-    def trip_planner_node(state: Travel_Agent):
-        """Generate personalized itinerary using search results"""
-        prompt = travel_prompt.format(
-            country=state["country"],
-            departure_date=state["departure_date"],
-            return_date=state["return_date"],
-            travel_style=state["travel_style"],
-            trip_type=state["trip_type"],
-            age_group=state["age_group"],
-            accommodation_type=state["accommodation_type"],
-            interests=", ".join(state["interests"]),
-            search_results=state.get("search_results", "No search results available.")
-        )
+    # Each session's last run is checkpointed so a re-plan only repeats the searches whose inputs changed.
+    checkpointer = BoundedMemorySaver()
+    return build_travel_agent(router, tavily_search, search_timeout=search_timeout, checkpointer=checkpointer)
 
-        response = llm.invoke(prompt)
-        return {"final_trip": response.content}
 
-    graph = StateGraph(Travel_Agent)
-    graph.add_node("research_node", research_node)
-    graph.add_node("trip_planner_node", trip_planner_node)
-    graph.add_edge(START, "research_node")
-    graph.add_edge("research_node", "trip_planner_node")
-    graph.add_edge("trip_planner_node", END)
+# Status lines for graph nodes as they finish (stream_mode="updates")
+NODE_LABELS = {
+    "research_node": "🔍 Research complete",
+    "compaction_node": "🧹 Picked the most relevant results",
+    "trip_planner_node": "✨ Itinerary written",
+    "outline_node": "🗂️ Split the trip into sections",
+    "section_node": "📝 Finished a section",
+    "merge_node": "🧩 Stitched the sections together",
+}
 
-    return graph.compile()
+
+def search_line(event):
+    """Status line for a "search" event written by the research node"""
+    if event["results"] is None:
+        return f"⚠️ No {event['kind']} results this time"
+    if event["source"] == "reused":
+        return f"♻️ Already had {event['results']} {event['kind']} results ready"
+    return f"🔎 Found {event['results']} {event['kind']} results"
 
 
 # Initialize session state
@@ -198,6 +112,10 @@ if 'trip_generated' not in st.session_state:
     st.session_state.trip_generated = False
 if 'trip_result' not in st.session_state:
     st.session_state.trip_result = None
+if 'thread_id' not in st.session_state:
+    st.session_state.thread_id = uuid.uuid4().hex
+if 'prefetcher' not in st.session_state:
+    st.session_state.prefetcher = Prefetcher(tavily_search)
 
 # Header
 st.title("✈️ AI Trip Planner")
@@ -266,6 +184,24 @@ with st.sidebar:
     st.markdown("---")
     generate_button = st.button("🚀 Generate My Trip", use_container_width=True)
 
+# Prepare input state
+input_state = {
+    "country": country,
+    "interests": interests,
+    "departure_date": departure_date.strftime("%Y-%m-%d"),
+    "return_date": return_date.strftime("%Y-%m-%d"),
+    "travel_style": travel_style,
+    "trip_type": trip_type,
+    "age_group": age_group,
+    "accommodation_type": accommodation_type,
+    "final_trip": "",
+    "search_results": ""
+}
+
+# Start this form's searches in the background once it settles, so Generate finds them done or in flight
+if interests:
+    st.session_state.prefetcher.update(build_queries(input_state))
+
 # Main content area
 if generate_button:
     if not interests:
@@ -284,52 +220,80 @@ if generate_button:
             </div>
             """, unsafe_allow_html=True)
 
-        # Progress messages
-        progress_messages = [
-            "🔍 Analyzing destinations...",
-            "🏨 Finding the best accommodations...",
-            "🍽️ Discovering local cuisine...",
-            "🎭 Curating experiences...",
-            "✨ Finalizing your itinerary..."
-        ]
-
         try:
             # Initialize travel agent
             travel_agent = init_travel_agent()
 
-            # Prepare input state
-            input_state = {
-                "country": country,
-                "interests": interests,
-                "departure_date": departure_date.strftime("%Y-%m-%d"),
-                "return_date": return_date.strftime("%Y-%m-%d"),
-                "travel_style": travel_style,
-                "trip_type": trip_type,
-                "age_group": age_group,
-                "accommodation_type": accommodation_type,
-                "final_trip": "",
-                "search_results": ""
-            }
-
-            # Show progress
+            # Show real progress: one line per finished search and node, then the itinerary as it streams
             with progress_container.container():
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-
-                for i, msg in enumerate(progress_messages):
-                    status_text.info(msg)
-                    progress_bar.progress((i + 1) / len(progress_messages))
-                    
-                    # Run the graph if we're at the start
-                    if i == 0:
-                        result = travel_agent.invoke(input_state)
+                status = st.status("🔍 Researching your destination...", expanded=True)
+                trip_placeholder = st.empty()
+
+            def stream_trip(state):
+                run_config = {"configurable": {"thread_id": st.session_state.thread_id}}
+                # Prefetched results are handed over like research reused from this session's last run.
+                previous = travel_agent.get_state(run_config).values.get("research") or {}
+                prefetched = st.session_state.prefetcher.collect(build_queries(state), timeout=search_timeout)
+                state = {**state, "research": {**previous, **prefetched}}
+
+                trip, streamed = "", ""
+                # Long trips are written in parallel sections, each streaming into its own placeholder.
+                section_placeholders, section_texts = {}, {}
+
+                def writing():
+                    if not streamed and not section_texts:
+                        loading_placeholder.empty()
+                        status.update(label="✍️ Writing your itinerary...")
+
+                for mode, chunk in travel_agent.stream(
+                    state,
+                    config=run_config,
+                    stream_mode=["updates", "messages", "custom"],
+                ):
+                    if mode == "custom" and chunk.get("event") == "search":
+                        status.write(search_line(chunk))
+                    elif mode == "messages":
+                        message, meta = chunk
+                        node, index = meta.get("langgraph_node"), meta.get("section")
+                        if node == "trip_planner_node" and message.content:
+                            writing()
+                            streamed += message.content
+                            trip_placeholder.markdown(streamed)
+                        elif node == "section_node" and message.content and index in section_placeholders:
+                            writing()
+                            section_texts[index] = section_texts.get(index, "") + message.content
+                            section_placeholders[index].markdown(section_texts[index])
+                    elif mode == "updates":
+                        for node, update in chunk.items():
+                            if node in NODE_LABELS:
+                                status.write(NODE_LABELS[node])
+                            if not update:
+                                continue
+                            if update.get("outline"):
+                                sections_area = trip_placeholder.container()
+                                for section in update["outline"]:
+                                    if section["index"] > 0:
+                                        sections_area.markdown("---")
+                                    section_placeholders[section["index"]] = sections_area.empty()
+                            for section in update.get("sections") or []:
+                                if section["index"] not in section_placeholders:
+                                    continue
+                                writing()
+                                section_texts[section["index"]] = section["text"]
+                                section_placeholders[section["index"]].markdown(section["text"])
+                            if node in ("trip_planner_node", "merge_node"):
+                                trip = update.get("final_trip", trip)
+                status.update(label="✨ Itinerary ready", state="complete", expanded=False)
+                return trip
+
+            trip_result = plan_cache.run(input_state, stream_trip)
 
             # Clear loading animations
             loading_placeholder.empty()
             progress_container.empty()
 
             # Store result
-            st.session_state.trip_result = result.get('final_trip', str(result))
+            st.session_state.trip_result = trip_result
             st.session_state.trip_generated = True
 
             # Display success message
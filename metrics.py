@@ -0,0 +1,178 @@
+"""Prometheus metrics for the graph nodes, the upstream calls and the API.
+
+All instruments are module-level prometheus_client objects; observing one costs
+about a microsecond, so they stay on in production. With several uvicorn
+workers set PROMETHEUS_MULTIPROC_DIR and /metrics aggregates across them.
+"""
+import asyncio
+import functools
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+node_latency = Histogram(
+    "travel_agent_node_latency_seconds", "Wall time of each LangGraph node", ["node"], buckets=LATENCY_BUCKETS
+)
+node_errors = Counter("travel_agent_node_errors_total", "Exceptions raised by LangGraph nodes", ["node"])
+
+upstream_latency = Histogram(
+    "travel_agent_upstream_latency_seconds", "Latency of calls to OpenAI and Tavily",
+    ["upstream", "kind"], buckets=LATENCY_BUCKETS,
+)
+upstream_errors = Counter(
+    "travel_agent_upstream_errors_total", "Failed or timed-out upstream calls", ["upstream", "kind", "reason"]
+)
+search_results = Histogram(
+    "travel_agent_search_results", "Results returned per search query", ["kind"], buckets=(0, 1, 3, 5, 7, 10, 20)
+)
+llm_tokens = Counter("travel_agent_llm_tokens_total", "LLM tokens by model and direction", ["model", "type"])
+llm_latency = Histogram(
+    "travel_agent_llm_latency_seconds", "Completion latency per model", ["model"], buckets=LATENCY_BUCKETS
+)
+llm_cost = Counter("travel_agent_llm_cost_dollars_total", "Estimated LLM spend from token usage", ["model"])
+llm_request_tokens = Histogram(
+    "travel_agent_llm_request_tokens", "Prompt, cached-prompt and completion tokens per LLM call", ["model", "type"],
+    buckets=(0, 128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192),
+)
+prompt_prefix = Gauge(
+    "travel_agent_prompt_prefix_tokens", "Tokens in the static, cacheable planner prompt prefix", ["sha"]
+)
+llm_routes = Counter("travel_agent_llm_routes_total", "Planner calls by model and routing reason", ["model", "reason"])
+llm_fallbacks = Counter(
+    "travel_agent_llm_fallbacks_total", "Planner calls abandoned for the other model", ["model", "reason"]
+)
+context_tokens = Histogram(
+    "travel_agent_context_tokens", "Search-context tokens sent to the planner after compaction",
+    buckets=(100, 250, 500, 1000, 1500, 2000, 4000, 8000),
+)
+context_tokens_saved = Counter(
+    "travel_agent_context_tokens_saved_total", "Search-result tokens compaction kept out of planner prompts"
+)
+
+api_latency = Histogram(
+    "travel_agent_api_latency_seconds", "Time to response headers per endpoint",
+    ["method", "path", "status"], buckets=LATENCY_BUCKETS,
+)
+api_queue_wait = Histogram(
+    "travel_agent_api_queue_wait_seconds", "Time a request waited for a free plan slot", buckets=LATENCY_BUCKETS
+)
+api_inflight = Gauge("travel_agent_api_inflight_plans", "Graph runs currently executing", multiprocess_mode="livesum")
+degraded_plans = Counter("travel_agent_degraded_plans_total", "Plans served per degradation level", ["level"])
+prefetch_searches = Counter(
+    "travel_agent_prefetch_searches_total", "Speculative research searches from the Streamlit form by outcome", ["outcome"]
+)
+cache_lookups = Counter("travel_agent_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+
+# USD per million (prompt, cached prompt, completion) tokens.
+MODEL_PRICES = {
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+
+def timed_node(name, func):
+    """Wrap a sync or async node function so its latency and errors are recorded"""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(state):
+            start = time.perf_counter()
+            try:
+                return await func(state)
+            except Exception:
+                node_errors.labels(name).inc()
+                raise
+            finally:
+                node_latency.labels(name).observe(time.perf_counter() - start)
+    else:
+        @functools.wraps(func)
+        def wrapper(state):
+            start = time.perf_counter()
+            try:
+                return func(state)
+            except Exception:
+                node_errors.labels(name).inc()
+                raise
+            finally:
+                node_latency.labels(name).observe(time.perf_counter() - start)
+    return wrapper
+
+
+def model_name(llm):
+    return getattr(llm, "model_name", type(llm).__name__)
+
+
+def token_usage(response):
+    """{"prompt", "cached_prompt", "completion"} token counts reported for one LLM response"""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {
+        "prompt": usage.get("input_tokens", 0),
+        "cached_prompt": (usage.get("input_token_details") or {}).get("cache_read", 0) or 0,
+        "completion": usage.get("output_tokens", 0),
+    }
+
+
+def observe_llm(llm, response, elapsed):
+    model = model_name(llm)
+    upstream_latency.labels("openai", "completion").observe(elapsed)
+    llm_latency.labels(model).observe(elapsed)
+    if not getattr(response, "usage_metadata", None):
+        return
+    usage = token_usage(response)
+    for kind, tokens in usage.items():
+        llm_tokens.labels(model, kind).inc(tokens)
+        llm_request_tokens.labels(model, kind).observe(tokens)
+    prices = MODEL_PRICES.get(model)
+    if prices is not None:
+        uncached = usage["prompt"] - usage["cached_prompt"]
+        llm_cost.labels(model).inc(
+            (uncached * prices[0] + usage["cached_prompt"] * prices[1] + usage["completion"] * prices[2]) / 1e6
+        )
+
+
+class InstrumentedSearch:
+    """Times each real search call and counts its results, labelled by query kind"""
+
+    def __init__(self, search, kind_of):
+        self.search = search
+        self.kind_of = kind_of
+
+    def _record(self, kind, results, start):
+        upstream_latency.labels("tavily", kind).observe(time.perf_counter() - start)
+        if isinstance(results, dict):
+            search_results.labels(kind).observe(len(results.get("results", [])))
+
+    def invoke(self, input):
+        kind, start = self.kind_of(input["query"]), time.perf_counter()
+        try:
+            results = self.search.invoke(input)
+        except Exception:
+            upstream_errors.labels("tavily", kind, "error").inc()
+            raise
+        self._record(kind, results, start)
+        return results
+
+    async def ainvoke(self, input):
+        kind, start = self.kind_of(input["query"]), time.perf_counter()
+        try:
+            results = await self.search.ainvoke(input)
+        except Exception:
+            upstream_errors.labels("tavily", kind, "error").inc()
+            raise
+        self._record(kind, results, start)
+        return results
+
+
+def render():
+    """Body and content type for the /metrics endpoint"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+
+PLAN_FIELDS = (
+    "country",
+    "interests",
+    "departure_date",
+    "return_date",
+    "travel_style",
+    "trip_type",
+    "age_group",
+    "accommodation_type",
+)
+
+
+def _fold(value):
+    return " ".join(value.lower().split()) if isinstance(value, str) else value
+
+
+def plan_key(request, namespace=""):
+    """Stable hash of a trip request: strings case/whitespace folded, interests sorted"""
+    canonical = {field: _fold(request.get(field)) for field in PLAN_FIELDS}
+    canonical["interests"] = sorted(_fold(i) for i in request.get("interests", []))
+    if request.get("legs"):
+        # Only multi-leg requests carry the key, so single-destination keys stay what they were.
+        canonical["legs"] = [{k: _fold(v) for k, v in leg.items()} for leg in request["legs"]]
+    canonical["namespace"] = namespace
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class Uncached:
+    """Return this from a plan function to hand `value` to every waiting caller without caching it"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def plan_text(result):
+    """The itinerary in a PlanCache result; a degraded API run hands its waiters (final_trip, level)"""
+    return result[0] if isinstance(result, tuple) else result
+
+
+class PlanCache:
+    """Caches finished itineraries by request hash and coalesces identical in-flight runs.
+
+    `run` is for threaded callers (Streamlit), `arun` for the async API; in both,
+    concurrent callers with the same request wait on the first caller's graph run.
+    Hits, misses (runs of `plan`) and coalesced waits are counted here rather than
+    in the store, which also sees `aget` lookups and counts nothing when disabled.
+    """
+
+    def __init__(self, store, namespace=""):
+        self.store = store
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._ainflight = {}
+
+    def key(self, request):
+        return plan_key(request, self.namespace)
+
+    async def aget(self, key):
+        """The cached plan stored under `key`, or None"""
+        return await self.store.aget(key)
+
+    def run(self, request, plan):
+        """Return the cached plan for `request`, or compute it with plan(request)"""
+        key = self.key(request)
+        result = self.store.get(key)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+            return result
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = plan(request)
+            self.store.set(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    async def arun(self, request, aplan):
+        """Async version of run; aplan(request) is awaited at most once per key at a time"""
+        key = self.key(request)
+        result = await self.store.aget(key)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+            return result
+
+        task = self._ainflight.get(key)
+        if task is not None:
+            with self._lock:
+                self.coalesced += 1
+            return await asyncio.shield(task)
+
+        with self._lock:
+            self.misses += 1
+
+        async def leader():
+            try:
+                result = await aplan(request)
+                if isinstance(result, Uncached):
+                    return result.value
+                await self.store.aset(key, result)
+                return result
+            finally:
+                del self._ainflight[key]
+
+        task = self._ainflight[key] = asyncio.ensure_future(leader())
+        return await asyncio.shield(task)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            **self.store.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "coalesced": self.coalesced,
+        }
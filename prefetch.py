@@ -0,0 +1,125 @@
+"""Speculative research while the user is still filling in the form.
+
+The research queries only depend on fields the Streamlit sidebar has long
+before Generate is clicked, so `Prefetcher.update(queries)` starts them in the
+background once the inputs have stopped changing for `delay` seconds, and
+`collect(queries)` hands the finished (or still running) results to the real
+run, which treats them like research reused from a previous run.
+
+When the inputs change, queued work for the old queries is cancelled. A call
+that already reached the network cannot be taken back; it still fills the
+search cache, but if Generate never asks for it, it counts as wasted. Each
+session stops speculating once `max_wasted` calls could have been wasted.
+
+Results already on disk are reused instead of searched again, but only ones
+the real run would also accept: cached entries within the cache TTL and index
+entries at most `max_age` old. Each prefetcher owns a small thread pool, shut
+down by `close()` or when the session drops the prefetcher.
+"""
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import config
+import metrics
+from research import normalize_results
+
+
+class Prefetcher:
+    def __init__(
+        self, search, delay=config.prefetch_delay, max_wasted=config.prefetch_max_wasted,
+        max_age=config.knowledge_index_max_age,
+    ):
+        self.search = search
+        self.delay = delay
+        self.max_wasted = max_wasted
+        self.max_age = max_age
+        self.wasted = 0
+        self._queries = ()
+        self._futures = {}
+        self._stored = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+        # The pool's threads never reference the prefetcher, so this runs once the session lets go of it.
+        self._shutdown = weakref.finalize(self, self._pool.shutdown, wait=False, cancel_futures=True)
+
+    def close(self):
+        """Cancel pending work and stop the pool's threads; the prefetcher is unusable afterwards"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._drop(keep=())
+            self._queries = ()
+        self._shutdown()
+
+    def update(self, queries):
+        """Call on every rerun with the queries the current inputs would search; restarts the settle timer"""
+        queries = tuple(queries)
+        with self._lock:
+            if queries == self._queries:
+                return
+            self._queries = queries
+            if self._timer is not None:
+                self._timer.cancel()
+            self._drop(keep=queries)
+            self._timer = threading.Timer(self.delay, self._start, args=(queries,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _drop(self, keep):
+        self._stored = {q: results for q, results in self._stored.items() if q in keep}
+        for query in [q for q in self._futures if q not in keep]:
+            future = self._futures.pop(query)
+            if future.cancel():
+                metrics.prefetch_searches.labels("cancelled").inc()
+            else:
+                self.wasted += 1
+                metrics.prefetch_searches.labels("wasted").inc()
+
+    def _start(self, queries):
+        with self._lock:
+            if queries != self._queries or not self._shutdown.alive:
+                return
+            for query in queries:
+                if query in self._futures or query in self._stored:
+                    continue
+                stored = self._peek(query)
+                if stored is not None:
+                    self._stored[query] = stored
+                    metrics.prefetch_searches.labels("stored").inc()
+                elif self.wasted + len(self._futures) < self.max_wasted:
+                    self._futures[query] = self._pool.submit(self.search.invoke, {"query": query})
+                    metrics.prefetch_searches.labels("started").inc()
+                else:
+                    metrics.prefetch_searches.labels("capped").inc()
+
+    def _peek(self, query):
+        peek = getattr(self.search, "peek", None)
+        if peek is None:
+            return None
+        # The index keeps entries of any age for degraded runs; prefetch only takes ones the run would use.
+        return peek({"query": query}, max_age=self.max_age)
+
+    def collect(self, queries, timeout=None):
+        """{query: results} for the prefetched queries, waiting up to `timeout` for ones still in flight"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            research = {q: normalize_results(self._stored[q]) for q in queries if q in self._stored}
+            futures = {q: self._futures.pop(q) for q in queries if q in self._futures}
+            self._drop(keep=())
+            # The form has not changed, so the rerun after Generate must not prefetch these again.
+            self._queries = tuple(queries)
+
+        wait(futures.values(), timeout=timeout)
+        for query, future in futures.items():
+            if not future.done():
+                # Gave up waiting: the run searches again and this call is lost.
+                with self._lock:
+                    self.wasted += 1
+                metrics.prefetch_searches.labels("wasted").inc()
+            elif not future.cancelled() and future.exception() is None:
+                research[query] = normalize_results(future.result())
+                metrics.prefetch_searches.labels("used").inc()
+        return research
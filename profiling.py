@@ -0,0 +1,156 @@
+"""Opt-in profiling of a single /response request.
+
+`Profile` samples the stacks of every thread in the worker at a fixed
+interval while one graph run executes, and its `node_timer` callback records
+when each LangGraph node (including the nodes of multi-leg subgraphs) starts
+and finishes. The stacks are written in the folded format that flamegraph.pl,
+speedscope and inferno read ("frame;frame;frame count" per line), next to a
+JSON file with the per-node breakdown.
+
+Nothing here runs unless a request asks for it: the sampler thread and the
+callback only exist for the profiled request. Other requests running in the
+same worker at the time show up in the samples too, so profile on a quiet
+worker when the picture matters.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import config
+
+
+def _label(code):
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _idle(frame):
+    # An executor worker waiting for work has no Python frame above its `_worker` loop.
+    code = frame.f_code
+    return code.co_name == "_worker" and code.co_filename.endswith(os.path.join("futures", "thread.py"))
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the start and duration of every graph node run it sees"""
+
+    run_inline = True
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.nodes = []
+        self._running = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # The node's task and the runnable inside it share the node's name; time only the outer one.
+        if node is None or node.startswith("__") or kwargs.get("name") != node or parent_run_id in self._running:
+            return
+        self._running[run_id] = (node, metadata.get("checkpoint_ns", ""), time.perf_counter())
+
+    def _finish(self, run_id, error=None):
+        started = self._running.pop(run_id, None)
+        if started is None:
+            return
+        node, namespace, start = started
+        entry = {
+            "node": node,
+            "namespace": namespace,
+            "start": round(start - self.origin, 4),
+            "duration": round(time.perf_counter() - start, 4),
+        }
+        if error is not None:
+            entry["error"] = repr(error)
+        self.nodes.append(entry)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def breakdown(self):
+        """{node: {"calls", "total", "max"}} in seconds"""
+        totals = {}
+        for entry in self.nodes:
+            node = totals.setdefault(entry["node"], {"calls": 0, "total": 0.0, "max": 0.0})
+            node["calls"] += 1
+            node["total"] = round(node["total"] + entry["duration"], 4)
+            node["max"] = max(node["max"], entry["duration"])
+        return totals
+
+
+class Profile:
+    """Context manager that samples every thread's stack each `interval` seconds"""
+
+    def __init__(self, interval=config.profile_interval):
+        self.id = uuid.uuid4().hex
+        self.interval = interval
+        self.samples = Counter()
+        self.origin = time.perf_counter()
+        self.wall = 0.0
+        self.node_timer = NodeTimer(self.origin)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.wall = time.perf_counter() - self.origin
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "wall": round(self.wall, 4),
+            "interval": self.interval,
+            "samples": sum(self.samples.values()),
+            "nodes": self.node_timer.nodes,
+            "by_node": self.node_timer.breakdown(),
+        }
+
+    def save(self, directory=config.profile_dir):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{self.id}.folded"), "w") as f:
+            f.write(self.folded())
+        with open(os.path.join(directory, f"{self.id}.json"), "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        return self.id
+
+
+def load(profile_id, directory=config.profile_dir):
+    """(summary dict, folded stacks) of a saved profile, or None"""
+    if not profile_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(directory, f"{profile_id}.json")) as f:
+            summary = json.load(f)
+        with open(os.path.join(directory, f"{profile_id}.folded")) as f:
+            return summary, f.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,140 @@
+"""Planner prompts, laid out for provider-side prefix caching.
+
+Every planner call is a system message holding `STATIC_PREFIX` followed by a
+user message with everything that varies, ordered from most to least shared:
+the search results (the same for everyone asking about the same place), then
+the user preferences, then the task. `STATIC_PREFIX` is a plain string with no
+format fields, so it is byte-identical across requests, tasks and workers and
+the provider can reuse its cached prefix; `PREFIX_SHA` identifies it in
+/metrics so an edit that invalidates the cache shows up.
+
+OpenAI only caches prompts whose shared prefix is at least 1024 tokens, and
+`STATIC_PREFIX` alone is about 300, so the cached prefix only forms once the
+search results shared by requests for the same place push it past that. It is
+deliberately not padded to the minimum: cached input tokens are still billed,
+and extra guidance changes the plans. Grow it only to make plans better.
+"""
+import hashlib
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+STATIC_PREFIX = """You are an expert luxury travel agent who crafts visually appealing, informative, and emotionally engaging travel itineraries.
+Your job is to generate balanced, accurate, and visually polished travel outputs based on the user inputs and REAL-TIME SEARCH DATA in the next message.
+
+**IMPORTANT**: Use the search results provided to give current, accurate recommendations for hotels, restaurants, activities, and attractions.
+Reference specific places, recent reviews, and up-to-date information from the search results.
+
+Avoid long blocks of text.
+Use emojis, headers, and short descriptive sections — like a premium travel brochure.
+Tone should feel high-end, warm, and vibrant — not robotic or overly formal.
+
+Each response should feel crafted and personalized to the traveler's style and interests.
+
+Add good enough details to make the itinerary actionable, but stay within the length the task asks for.
+
+When the task covers the whole trip or its accommodation, end with links for flights and accommodation booking sites and other things related to the output. All recommendations should be based on the search results provided.
+
+The next message gives your task, the user preferences and the current travel information.
+"""
+
+PREFIX_SHA = hashlib.sha256(STATIC_PREFIX.encode()).hexdigest()[:12]
+
+TASKS = {
+    "itinerary": (
+        "**Task:** Create a personalized itinerary for the whole trip incorporating the real-time information above. "
+        "Keep it concise (300-400 words)."
+    ),
+    "overview": (
+        "**Task:** Write ONLY the opening section of a longer brochure: a title, a short warm welcome for the whole "
+        "trip, where to stay, and links for flights and accommodation booking sites. Other writers cover the "
+        "day-by-day plan. Keep it to 150-200 words."
+    ),
+    "days": (
+        "**Task:** Write ONLY days {first_day} to {last_day} of the itinerary ({start_date} to {end_date}), giving "
+        "each day its own header, about 100 words per day. The introduction, accommodation, booking links and the "
+        "other days are written separately: do not repeat them."
+    ),
+    "route": (
+        "**Task:** Write ONLY the opening section of a multi-country brochure for {route}: a title, a short warm "
+        "welcome, the route with its dates, how to get between the countries, and links for flights and "
+        "accommodation booking sites. Other writers cover each country. Keep it to 150-200 words."
+    ),
+    "leg": (
+        "**Task:** Write ONLY the {country} part (leg {number} of {count}, {start_date} to {end_date}) of a "
+        "multi-country brochure: a header for the leg, where to stay, and a day-by-day plan incorporating the "
+        "real-time information above, numbering the days from Day {first_day} of the whole trip. The trip "
+        "introduction and the other countries are written separately: do not repeat them. Keep it concise "
+        "(300-400 words)."
+    ),
+    "leg_overview": (
+        "**Task:** Write ONLY the opening of the {country} part (leg {number} of {count}, {start_date} to "
+        "{end_date}) of a multi-country brochure: a header for the leg and where to stay. The trip introduction, "
+        "booking links, the day-by-day plan and the other countries are written separately: do not repeat them. "
+        "Keep it to 100-150 words."
+    ),
+}
+
+DETAILS = """**Current Travel Information (Use this data):**
+
+{search_results}
+
+---
+
+**User Preferences:**
+
+🌍 Destination: {country}
+📅 Dates: {departure_date} to {return_date}
+✨ Style: {travel_style}
+👥 Trip Type: {trip_type}
+👤 Age Group: {age_group}
+🏨 Accommodation: {accommodation_type}
+💫 Interests: {interests}
+
+---
+
+"""
+
+
+def build_messages(state, task="itinerary", **fields):
+    """[static system prefix, variable user message] for one planner call"""
+    variable = DETAILS.format(
+        country=state["country"],
+        departure_date=state["departure_date"],
+        return_date=state["return_date"],
+        travel_style=state["travel_style"],
+        trip_type=state["trip_type"],
+        age_group=state["age_group"],
+        accommodation_type=state["accommodation_type"],
+        interests=", ".join(state["interests"]),
+        search_results=state.get("search_results", "No search results available."),
+    ) + TASKS[task].format(**fields)
+    return [SystemMessage(content=STATIC_PREFIX), HumanMessage(content=variable)]
+
+
+def plan_messages(state):
+    """Messages for planning a whole trip in one call, or one leg of a multi-leg trip"""
+    leg = state.get("leg")
+    if leg is None:
+        return build_messages(state)
+    return build_messages(state, "leg", **leg)
+
+
+def section_messages(state, section):
+    """Messages for one section of a long trip or leg (see itinerary.outline), or the route of a multi-leg one"""
+    state = {**state, "search_results": section["search_results"]}
+    if section["kind"] == "overview":
+        leg = state.get("leg")
+        if leg is None:
+            return build_messages(state, "overview")
+        return build_messages(state, "leg_overview", **leg)
+    if section["kind"] == "route":
+        return build_messages(state, "route", route=section["route"])
+    return build_messages(
+        state, "days",
+        first_day=section["first_day"], last_day=section["last_day"],
+        start_date=section["start_date"], end_date=section["end_date"],
+    )
+
+
+def prompt_text(messages):
+    return "\n\n".join(m.content for m in messages)
@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import metrics
+
+
+def build_queries(state):
+    """Build the search queries for a trip"""
+    queries = [
+        f"best {state['travel_style']} {state['accommodation_type']} in {state['country']} 2025",
+        f"top things to do in {state['country']} for {', '.join(state['interests'][:2])}",
+    ]
+
+    if len(state['interests']) > 0:
+        queries.append(f"{state['country']} {state['interests'][0]} recommendations {state['departure_date'][:4]}")
+
+    return queries
+
+
+def query_kind(query):
+    """Which build_queries template a query came from, for metric labels"""
+    if query.startswith("best "):
+        return "lodging"
+    if query.startswith("top things to do"):
+        return "activities"
+    if query.rsplit(" ", 1)[0].endswith(" recommendations"):
+        return "interest"
+    return "other"
+
+
+def normalize_results(results):
+    """Turn whatever the search tool returned into a list of result dicts"""
+    if isinstance(results, str):
+        try:
+            results = json.loads(results)
+        except Exception:
+            return [{"url": "N/A", "content": results}]
+
+    if isinstance(results, dict):
+        results = results.get("results", [results])
+
+    return [r for r in results if isinstance(r, dict)]
+
+
+def format_results(results):
+    """Render result dicts into the text block used by the prompt"""
+    formatted_results = "\n\n".join([
+        f"Source: {r.get('url', 'N/A')}\n{r.get('content', '')}"
+        for r in results
+    ])
+
+    return formatted_results or "No search results found."
+
+
+def search_each(search, queries, timeout=None, on_done=None):
+    """Run all queries at once on threads; returns {query: results} for those that finished before the deadline.
+
+    `on_done(query, results)` is called as each query finishes, with None if it failed or timed out.
+    """
+    if not queries:
+        return {}
+
+    pool = ThreadPoolExecutor(max_workers=len(queries))
+    # Each thread gets a copy of the caller's context so per-request state (capture.current) follows the call.
+    futures = {
+        pool.submit(contextvars.copy_context().run, search.invoke, {"query": query}): query for query in queries
+    }
+
+    results, finished = {}, set()
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            query = futures[future]
+            finished.add(query)
+            try:
+                results[query] = normalize_results(future.result())
+            except Exception as e:
+                print(f"Search error for '{query}': {e}")
+            if on_done is not None:
+                on_done(query, results.get(query))
+    except FutureTimeout:
+        pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for query in queries:
+        if query not in finished:
+            print(f"Search timed out for '{query}'")
+            metrics.upstream_errors.labels("tavily", query_kind(query), "timeout").inc()
+            if on_done is not None:
+                on_done(query, None)
+
+    return {query: results[query] for query in queries if query in results}
+
+
+async def asearch_each(search, queries, timeout=None, on_done=None):
+    """Async version of search_each: fan out every query, each with its own deadline"""
+    async def run(query):
+        batch = None
+        try:
+            batch = normalize_results(await asyncio.wait_for(search.ainvoke({"query": query}), timeout))
+        except asyncio.TimeoutError:
+            print(f"Search timed out for '{query}'")
+            metrics.upstream_errors.labels("tavily", query_kind(query), "timeout").inc()
+        except Exception as e:
+            print(f"Search error for '{query}': {e}")
+        if on_done is not None:
+            on_done(query, batch)
+        return batch
+
+    batches = await asyncio.gather(*(run(query) for query in queries))
+    return {query: batch for query, batch in zip(queries, batches) if batch is not None}
+
+
+def flatten(queries, results):
+    return [r for query in queries for r in results.get(query, [])]
+
+
+def reusable_research(state, queries):
+    """Results from the previous run of this thread for queries that are unchanged"""
+    previous = state.get("research") or {}
+    return {query: previous[query] for query in queries if query in previous}
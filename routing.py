@@ -0,0 +1,105 @@
+"""Per-request choice between a fast and a strong planner model.
+
+`ModelRouter.route` sends simple trips (few nights, few interests, a cheap travel
+style) to the fast model and everything else to the strong one. `invoke` /
+`ainvoke` call the chosen model and, if fallback is on, retry on the other
+model when the first one errors or takes longer than `fallback_timeout`.
+Every decision, fallback and per-model latency/cost lands in metrics.py.
+"""
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import config
+import metrics
+from itinerary import trip_nights
+
+
+class ModelRouter:
+    def __init__(self, fast, strong=None, max_nights=config.route_fast_max_nights,
+                 max_interests=config.route_fast_max_interests, fast_styles=config.route_fast_styles,
+                 fallback=config.llm_fallback, fallback_timeout=config.llm_fallback_timeout):
+        self.fast = fast
+        self.strong = strong
+        self.max_nights = max_nights
+        self.max_interests = max_interests
+        self.fast_styles = set(fast_styles)
+        self.fallback = fallback
+        self.fallback_timeout = fallback_timeout or None
+
+    def route(self, state, nights=None):
+        """Ordered models to try for this request, and the reason the first one was picked"""
+        if self.strong is None:
+            return [self.fast], "single"
+
+        nights = trip_nights(state) if nights is None else nights
+        if nights > self.max_nights:
+            reason = "long_trip"
+        elif len(state.get("interests", [])) > self.max_interests:
+            reason = "many_interests"
+        elif state.get("travel_style") not in self.fast_styles:
+            reason = "style"
+        else:
+            reason = "simple"
+
+        models = [self.fast, self.strong] if reason == "simple" else [self.strong, self.fast]
+        return (models if self.fallback else models[:1]), reason
+
+    def _record(self, model, reason, response, elapsed):
+        metrics.llm_routes.labels(metrics.model_name(model), reason).inc()
+        metrics.observe_llm(model, response, elapsed)
+
+    def _failed(self, model, models, error):
+        failure = "timeout" if isinstance(error, (asyncio.TimeoutError, FutureTimeout)) else "error"
+        metrics.upstream_errors.labels("openai", "completion", failure).inc()
+        if model is models[-1]:
+            return False
+        metrics.llm_fallbacks.labels(metrics.model_name(model), failure).inc()
+        print(f"{metrics.model_name(model)} {failure}, falling back: {error!r}")
+        return True
+
+    def invoke(self, prompt, state, acquire=None, nights=None, config=None):
+        models, reason = self.route(state, nights)
+        for model in models:
+            if acquire is not None:
+                acquire()
+            start = time.perf_counter()
+            timeout = self.fallback_timeout if model is not models[-1] else None
+            try:
+                response = self._invoke(model, prompt, config, timeout)
+            except Exception as e:
+                if not self._failed(model, models, e):
+                    raise
+                reason = "fallback"
+                continue
+            self._record(model, reason, response, time.perf_counter() - start)
+            return response
+
+    async def ainvoke(self, prompt, state, aacquire=None, nights=None, config=None):
+        models, reason = self.route(state, nights)
+        for model in models:
+            if aacquire is not None:
+                await aacquire()
+            start = time.perf_counter()
+            timeout = self.fallback_timeout if model is not models[-1] else None
+            try:
+                response = await asyncio.wait_for(model.ainvoke(prompt, config), timeout)
+            except Exception as e:
+                if not self._failed(model, models, e):
+                    raise
+                reason = "fallback"
+                continue
+            self._record(model, reason, response, time.perf_counter() - start)
+            return response
+
+    @staticmethod
+    def _invoke(model, prompt, config, timeout):
+        if timeout is None:
+            return model.invoke(prompt, config)
+        # Same thread-and-deadline approach as research.search_each; the slow call is abandoned.
+        pool = ThreadPoolExecutor(max_workers=1)
+        future = pool.submit(contextvars.copy_context().run, model.invoke, prompt, config)
+        pool.shutdown(wait=False)
+        return future.result(timeout=timeout)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config reads these at import time; keep the suite off the real caches and the network.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+os.environ.setdefault("CACHE_PATH", os.path.join(os.path.dirname(__file__), ".cache", "test.sqlite"))
+os.environ.setdefault("KNOWLEDGE_INDEX_PATH", os.path.join(os.path.dirname(__file__), ".cache", "no-index"))
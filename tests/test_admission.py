@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_interactive_waiters_go_before_batch():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=10)
+        await controller.acquire()
+        order = []
+
+        async def wait(name, priority):
+            await controller.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(wait("batch", "batch")), asyncio.ensure_future(wait("interactive", "interactive"))]
+        await _settle()
+        assert controller.queued == 2
+
+        controller.release()
+        await _settle()
+        controller.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch"]
+
+
+def test_full_queue_raises_overloaded():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await _settle()
+
+        assert controller.full()
+        with pytest.raises(Overloaded) as raised:
+            await controller.acquire()
+        assert raised.value.retry_after >= 1
+        assert controller.rejected == 1
+
+        # Batch work may queue past the limit instead of being turned away.
+        batch = asyncio.ensure_future(controller.acquire("batch", reject=False))
+        await _settle()
+        assert controller.queued == 2
+        for task in (waiter, batch):
+            task.cancel()
+        await asyncio.gather(waiter, batch, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=10)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await _settle()
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.queued == 0
+        assert controller._waiters == []
+
+        controller.release()
+        assert controller.inflight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_already_popped_by_release():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=10)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await _settle()
+
+        # release() runs before the cancelled task gets to clean up after itself.
+        waiter.cancel()
+        controller.release()
+        results = await asyncio.gather(waiter, return_exceptions=True)
+
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert controller.inflight == 0
+        assert controller._waiters == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from batch import SharedSearch, aplan_batch, plan_batch
+from fakes import FakeChatModel, FakeSearch
+from travel_core import build_travel_agent
+
+TRIP = {
+    "country": "Japan",
+    "interests": ["food", "culture"],
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-05",
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "adult",
+    "accommodation_type": "hostel",
+}
+
+
+class FlakySearch(FakeSearch):
+    def __init__(self):
+        super().__init__(default_delay=0.01)
+        self.failed = False
+
+    async def ainvoke(self, input):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if not self.failed:
+            self.failed = True
+            raise ConnectionError("tavily down")
+        return self._results(input["query"])
+
+
+def build_agent(search):
+    return build_travel_agent(FakeChatModel(reply="Day 1: arrive"), search, search_timeout=1.0)
+
+
+def test_shared_search_issues_one_call_per_normalized_query():
+    search = SharedSearch(FakeSearch(default_delay=0.05))
+
+    async def scenario():
+        return await asyncio.gather(
+            search.ainvoke({"query": "top things to do in Japan for food, culture"}),
+            search.ainvoke({"query": "Top things to do in japan for culture, food"}),
+            search.ainvoke({"query": "best budget hostel in Japan 2025"}),
+        )
+
+    first, second, _ = asyncio.run(scenario())
+    assert first is second
+    assert search.search.calls == 2
+    assert search.shared == 1
+
+
+def test_shared_search_threads_share_one_call():
+    search = SharedSearch(FakeSearch(default_delay=0.05))
+    threads = [threading.Thread(target=search.invoke, args=({"query": "Japan food"},)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert search.search.calls == 1
+    assert search.shared == 3
+
+
+def test_shared_search_retries_after_a_failure():
+    search = SharedSearch(FlakySearch())
+
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            await search.ainvoke({"query": "Japan food"})
+        return await search.ainvoke({"query": "Japan food"})
+
+    assert asyncio.run(scenario())["results"]
+    assert search.search.calls == 2
+
+
+def test_batch_items_share_searches_and_report_each_result():
+    search = FakeSearch(default_delay=0.01)
+    items = [TRIP, {**TRIP, "trip_type": "friends"}, {**TRIP, "country": "Italy"}]
+
+    async def scenario():
+        return [item async for item in aplan_batch(items, build_agent, search, concurrency=2)]
+
+    results = asyncio.run(scenario())
+    assert sorted(index for index, _, _ in results) == [0, 1, 2]
+    assert all(final_trip == "Day 1: arrive" and error is None for _, final_trip, error in results)
+    # Two countries, three research queries each.
+    assert search.calls == 6
+
+
+def test_plan_batch_reports_errors_per_item():
+    def failing_agent(search):
+        agent = build_agent(search)
+
+        class Agent:
+            def invoke(self, request):
+                if request["country"] == "Peru":
+                    raise ValueError("no flights")
+                return agent.invoke(request)
+
+        return Agent()
+
+    results = sorted(plan_batch([TRIP, {**TRIP, "country": "Peru"}], failing_agent, FakeSearch(), concurrency=2))
+    assert results == [(0, "Day 1: arrive", None), (1, None, "no flights")]
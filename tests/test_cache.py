@@ -0,0 +1,105 @@
+from prometheus_client import REGISTRY
+
+import cache
+from cache import DiskCache, normalize_query
+from plan_cache import plan_key
+
+REQUEST = {
+    "country": "Japan",
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-08",
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "25-34",
+    "accommodation_type": "hostel",
+    "interests": ["food", "culture"],
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query_folds_case_whitespace_and_list_order():
+    a = normalize_query("Top things to do in  Japan for Food, Culture")
+    b = normalize_query("top things to do in japan for culture,food ")
+    assert a == b == "top things to do in japan for culture, food"
+
+
+def test_normalize_query_keeps_multi_word_interests_apart():
+    a = normalize_query("top things to do in Japan for street food, art")
+    b = normalize_query("top things to do in Japan for street art, food")
+    assert a == "top things to do in japan for art, street food"
+    assert b == "top things to do in japan for food, street art"
+    assert normalize_query("top things to do in japan for art, street food") == a
+
+
+def test_normalize_query_without_list():
+    assert normalize_query("  Best BUDGET hostel in Japan 2025 ") == "best budget hostel in japan 2025"
+
+
+def test_plan_key_is_canonical():
+    same = {**REQUEST, "country": " japan ", "travel_style": "Budget", "interests": ["Culture", "food"]}
+    assert plan_key(same) == plan_key(REQUEST)
+
+
+def test_plan_key_separates_requests_and_namespaces():
+    assert plan_key({**REQUEST, "country": "Italy"}) != plan_key(REQUEST)
+    assert plan_key(REQUEST, namespace="other-model") != plan_key(REQUEST)
+    legs = [{"country": "Japan", "start_date": "2025-11-01", "end_date": "2025-11-04"}]
+    assert plan_key({**REQUEST, "legs": legs}) != plan_key(REQUEST)
+
+
+def test_disk_cache_expires_after_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    store = DiskCache(str(tmp_path / "cache.sqlite"), "entries", ttl=60)
+
+    store.set("k", {"v": 1})
+    clock.now += 59
+    assert store.get("k") == {"v": 1}
+    clock.now += 2
+    assert store.get("k") is None
+    assert (store.hits, store.misses) == (1, 1)
+    assert store.stats()["entries"] == 0
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    store = DiskCache(str(tmp_path / "cache.sqlite"), "entries", ttl=3600, max_entries=2)
+
+    store.set("a", 1)
+    clock.now += 1
+    store.set("b", 2)
+    clock.now += 1
+    assert store.get("a") == 1
+    clock.now += 1
+    store.set("c", 3)
+
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+
+
+def test_disk_cache_ttl_zero_disables(tmp_path):
+    store = DiskCache(str(tmp_path / "cache.sqlite"), "entries", ttl=0)
+    store.set("k", 1)
+    assert store.get("k") is None
+
+
+def test_disk_cache_lookups_are_exported_as_a_counter(tmp_path):
+    def lookups(result):
+        return REGISTRY.get_sample_value("travel_agent_cache_lookups_total", {"cache": "test", "result": result}) or 0
+
+    store = DiskCache(str(tmp_path / "cache.sqlite"), "entries", name="test")
+    before = lookups("hit"), lookups("miss")
+    store.get("k")
+    store.set("k", {"v": 1})
+    store.get("k")
+
+    assert (lookups("hit"), lookups("miss")) == (before[0] + 1, before[1] + 1)
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.replay import ReplayServer
+from capture import Capture, CaptureMiddleware, Recorder, load, record, request_key
+
+SEARCH = {"query": "top things to do in Japan for food", "api_key": "secret"}
+ANSWER = {"results": [{"url": "https://example.com/ramen", "content": "Ramen"}]}
+
+
+class Body(httpx.SyncByteStream):
+    """A body that arrives over the wire in two chunks, like a real upstream response"""
+
+    def __iter__(self):
+        data = json.dumps(ANSWER).encode()
+        yield data[:10]
+        yield data[10:]
+
+
+def search_app(request):
+    return httpx.Response(200, headers={"content-type": "application/json"}, stream=Body())
+
+
+def captured_search(capture):
+    """Make one Tavily-style call through a transport that records it into `capture`"""
+    transport = httpx.MockTransport(search_app)
+
+    class Recording(httpx.BaseTransport):
+        def handle_request(self, request):
+            return record(capture, request, transport.handle_request(request), sent=capture.start)
+
+    with httpx.Client(transport=Recording(), base_url="https://api.tavily.com") as client:
+        return client.post("/search", json=SEARCH).json()
+
+
+def test_request_key_ignores_the_api_key():
+    key, label = request_key(json.dumps(SEARCH).encode())
+    assert label == SEARCH["query"]
+    assert (key, label) == request_key(json.dumps({**SEARCH, "api_key": "other"}).encode())
+    assert request_key(b"not json")[1] == ""
+
+
+def test_upstream_exchange_is_recorded_with_its_chunks():
+    capture = Capture("POST", "/response", "")
+    assert captured_search(capture) == ANSWER
+
+    (exchange,) = capture.record["upstream"]
+    assert (exchange["kind"], exchange["label"], exchange["status"]) == ("search", SEARCH["query"], 200)
+    assert len(exchange["chunks"]) == 2
+    assert json.loads("".join(data for _, data in exchange["chunks"])) == ANSWER
+
+
+def test_middleware_writes_sampled_requests(tmp_path):
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    recorder = Recorder(str(tmp_path), rate=1.0)
+    middleware = CaptureMiddleware(app, recorder)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://api") as client:
+            await client.post("/response", json={"country": "Japan"})
+            await client.get("/cache/stats")
+
+    asyncio.run(scenario())
+    (captured,) = load(recorder.path)
+    assert (captured["path"], captured["status"], captured["body"]) == ("/response", 200, {"country": "Japan"})
+
+
+def test_replay_serves_the_recorded_response(tmp_path):
+    capture = Capture("POST", "/response", "")
+    captured_search(capture)
+    recorder = Recorder(str(tmp_path), rate=1.0)
+    recorder.write(capture)
+
+    with ReplayServer(load(recorder.path), scale=0.0) as server, httpx.Client(base_url=server.url) as client:
+        exact = client.post("/search", json=SEARCH)
+        # A changed query still gets an answer of the same kind.
+        by_kind = client.post("/search", json={"query": "best budget hostel in Japan 2025"})
+        missing = client.post("/chat/completions", json={"model": "gpt-4o-mini"})
+
+    assert exact.json() == by_kind.json() == ANSWER
+    assert missing.status_code == 404
+    assert dict(server.matches) == {"exact": 1, "kind": 1, "missing": 1}
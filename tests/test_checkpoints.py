@@ -0,0 +1,75 @@
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from checkpoints import BoundedMemorySaver
+
+
+class State(TypedDict, total=False):
+    query: str
+    research: dict
+    log: Annotated[list, operator.add]
+
+
+def build(checkpointer):
+    def research(state):
+        return {"research": {**state.get("research", {}), state["query"]: len(state["query"])}, "log": ["research"]}
+
+    def plan(state):
+        return {"log": ["plan"]}
+
+    graph = StateGraph(State)
+    graph.add_node("research", research)
+    graph.add_node("plan", plan)
+    graph.add_edge(START, "research")
+    graph.add_edge("research", "plan")
+    graph.add_edge("plan", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def run(app, thread_id, query):
+    return app.invoke({"query": query}, {"configurable": {"thread_id": thread_id}})
+
+
+def test_memory_saver_internals_are_what_pruning_expects():
+    # BoundedMemorySaver prunes MemorySaver's private dicts; fail loudly if a langgraph upgrade reshapes them.
+    saver = MemorySaver()
+    run(build(saver), "t", "japan")
+
+    checkpoints = saver.storage["t"][""]
+    assert checkpoints and all(isinstance(entry, tuple) for entry in checkpoints.values())
+    assert saver.writes and all(len(key) == 3 and key[:2] == ("t", "") for key in saver.writes)
+    assert {key[2] for key in saver.writes} <= set(checkpoints)
+    assert saver.blobs and all(len(key) == 4 and key[:2] == ("t", "") for key in saver.blobs)
+    assert {"query", "research"} <= {key[2] for key in saver.blobs}
+
+
+def test_only_the_latest_run_of_a_thread_is_kept():
+    saver = BoundedMemorySaver(max_threads=8)
+    app = build(saver)
+    run(app, "t", "japan")
+    first_run = set(saver.storage["t"][""])
+    result = run(app, "t", "italy")
+
+    # The second run starts from the first one's state and still sees it.
+    assert result["research"] == {"japan": 5, "italy": 5}
+    assert result["log"] == ["research", "plan", "research", "plan"]
+    assert not first_run & set(saver.storage["t"][""])
+    assert len(saver.storage["t"][""]) == len(first_run)
+    state = app.get_state({"configurable": {"thread_id": "t"}})
+    assert state.values["research"] == result["research"]
+
+
+def test_least_recently_used_threads_are_forgotten():
+    saver = BoundedMemorySaver(max_threads=2)
+    app = build(saver)
+    for thread_id in ("a", "b"):
+        run(app, thread_id, "japan")
+    run(app, "a", "italy")
+    run(app, "c", "peru")
+
+    assert set(saver.storage) == {"a", "c"}
+    assert not any(key[0] == "b" for key in saver.blobs)
+    assert app.get_state({"configurable": {"thread_id": "b"}}).values == {}
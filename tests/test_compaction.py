@@ -0,0 +1,48 @@
+from compaction import compact_results, count_tokens, dedup, rank
+
+STATE = {"interests": ["street food"], "travel_style": "budget", "accommodation_type": "hostel"}
+RAMEN = "Tokyo has the best ramen stalls and street food markets, open until late every night"
+
+
+def result(url, content, score=0.0):
+    return {"url": url, "content": content, "score": score}
+
+
+def test_dedup_drops_repeated_urls_and_near_identical_snippets():
+    results = [
+        result("https://www.example.com/ramen/", RAMEN),
+        result("http://example.com/ramen?utm=x", "Something else entirely about temples"),
+        result("https://other.com/copy", RAMEN + " too"),
+        result("https://other.com/temples", "Kyoto temples and gardens are quiet early in the morning"),
+    ]
+    assert [r["url"] for r in dedup(results)] == ["https://www.example.com/ramen/", "https://other.com/temples"]
+
+
+def test_dedup_keeps_distinct_urls_without_content():
+    results = [result("https://example.com/a", ""), result("https://example.com/b", ""), result("N/A", "")]
+    assert dedup(results) == results
+    assert len(dedup(results + [result("https://example.com/a", "")])) == 3
+
+
+def test_rank_puts_matching_snippets_first():
+    results = [
+        result("https://example.com/museum", "The national museum has a large collection of paintings"),
+        result("https://example.com/food", "Budget street food tours start from the hostel district"),
+    ]
+    assert [r["url"] for r in rank(results, STATE)] == ["https://example.com/food", "https://example.com/museum"]
+
+
+def test_compact_results_stays_within_the_budget():
+    results = [result(f"https://example.com/{i}", f"Snippet {i} " + "about street food in Tokyo " * 40) for i in range(10)]
+    text, stats = compact_results(results, STATE, token_budget=300)
+
+    assert count_tokens(text) <= 300
+    assert stats["results_in"] == 10
+    assert 0 < stats["results_kept"] < 10
+    assert stats["tokens_saved"] == stats["raw_tokens"] - stats["context_tokens"] > 0
+
+
+def test_compact_results_without_results():
+    text, stats = compact_results([], STATE, token_budget=300)
+    assert text == "No search results found."
+    assert stats["context_tokens"] == stats["tokens_saved"] == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from degradation import (
+    FEWER_RESULTS, FULL, NO_RESEARCH, SINGLE_QUERY, STORED_ONLY, DegradationPolicy, select_queries, trim_research,
+)
+from research import build_queries
+
+STATE = {
+    "country": "Japan",
+    "travel_style": "budget",
+    "accommodation_type": "hostel",
+    "interests": ["food", "culture"],
+    "departure_date": "2025-11-01",
+}
+
+
+@pytest.mark.parametrize("queue_fill, latency, level", [
+    (0.0, 1.0, FULL),
+    (0.5, 1.0, FEWER_RESULTS),
+    (0.0, 60.0, SINGLE_QUERY),
+    (0.8, 90.0, STORED_ONLY),
+    (0.95, 1.0, STORED_ONLY),
+    (1.0, 120.0, NO_RESEARCH),
+])
+def test_level_follows_the_worst_signal(queue_fill, latency, level):
+    policy = DegradationPolicy(
+        lambda: (queue_fill, latency), queue_thresholds=[0.9, 0.5, 0.8], latency_thresholds=[20, 60, 90, 120],
+    )
+    assert policy.level() == level
+
+
+def test_select_queries_keeps_activities_from_single_query_on():
+    queries = build_queries(STATE)
+    assert select_queries(queries, FEWER_RESULTS) == queries
+    assert select_queries(queries, SINGLE_QUERY) == [q for q in queries if q.startswith("top things to do")]
+
+
+def test_trim_research_caps_results_per_query():
+    research = {"q": [{"url": str(i)} for i in range(5)]}
+    assert trim_research(research, FULL, max_results=2) is research
+    assert len(trim_research(research, FEWER_RESULTS, max_results=2)["q"]) == 2
@@ -0,0 +1,49 @@
+import asyncio
+
+from fakes import FakeChatModel, FakeSearch
+from itinerary import SEPARATOR
+from travel_core import build_travel_agent
+
+TRIP = {
+    "country": "Japan",
+    "interests": ["food", "culture"],
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-05",
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "adult",
+    "accommodation_type": "hostel",
+}
+REPLY = "Day 1: Ramen in Shinjuku."
+
+
+def test_short_trip_is_one_planner_call():
+    search = FakeSearch()
+    agent = build_travel_agent(FakeChatModel(reply=REPLY), search, search_timeout=1.0)
+    result = agent.invoke(TRIP)
+
+    assert result["final_trip"] == REPLY
+    assert search.calls == 3
+    assert len(result["research"]) == 3 and all("Japan" in q for q in result["research"])
+    assert "https://example.com/" in result["search_results"]
+
+
+def test_long_trip_is_written_in_sections_and_merged():
+    search = FakeSearch()
+    agent = build_travel_agent(
+        FakeChatModel(reply=REPLY), search, search_timeout=1.0, long_trip_nights=3, chunk_days=2,
+    )
+    result = asyncio.run(agent.ainvoke({**TRIP, "return_date": "2025-11-08"}))
+
+    # An overview plus four two-day sections for eight days.
+    assert result["final_trip"].split(SEPARATOR) == [REPLY] * 5
+    assert search.calls == 3
+
+
+def test_failed_searches_still_produce_a_plan():
+    search = FakeSearch(delays={"best": 5.0})
+    agent = build_travel_agent(FakeChatModel(reply=REPLY), search, search_timeout=0.2)
+    result = asyncio.run(agent.ainvoke(TRIP))
+
+    assert result["final_trip"] == REPLY
+    assert not any(q.startswith("best") for q in result["research"])
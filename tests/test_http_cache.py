@@ -0,0 +1,60 @@
+import gzip
+import json
+
+from starlette.requests import Request
+
+import config
+from http_cache import etag, json_response, not_modified
+
+PAYLOAD = {"final_result": "Day 1: arrive. " * 200}
+
+
+def request(method="GET", **headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw})
+
+
+def test_etag_is_weak_and_stable():
+    tag = etag("key", b"body")
+    assert tag.startswith('W/"')
+    assert tag == etag("key", b"body") != etag("key", b"other")
+
+
+def test_not_modified_uses_weak_comparison():
+    tag = etag("key", b"body")
+    assert not_modified(tag.removeprefix("W/"), tag)
+    assert not_modified(f'"other", {tag}', tag)
+    assert not_modified("*", tag)
+    assert not not_modified('"other"', tag)
+    assert not not_modified(None, tag)
+
+
+def test_get_with_matching_tag_is_304():
+    first = json_response(request(), PAYLOAD, key="k")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == config.plan_cache_control
+
+    again = json_response(request(if_none_match=first.headers["etag"]), PAYLOAD, key="k")
+    assert again.status_code == 304
+    assert again.body == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_post_ignores_if_none_match():
+    tag = json_response(request(), PAYLOAD, key="k").headers["etag"]
+    response = json_response(request("POST", if_none_match=tag), PAYLOAD, key="k")
+    assert response.status_code == 200
+    assert json.loads(response.body) == PAYLOAD
+
+
+def test_changed_body_gets_a_new_tag():
+    tag = json_response(request(), PAYLOAD, key="k").headers["etag"]
+    response = json_response(request(if_none_match=tag), {"final_result": "changed"}, key="k")
+    assert response.status_code == 200
+
+
+def test_large_bodies_are_gzipped_when_accepted():
+    response = json_response(request(accept_encoding="gzip"), PAYLOAD)
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body)) == PAYLOAD
+    assert "etag" not in response.headers
@@ -0,0 +1,66 @@
+from itinerary import (
+    SectionStream, day_ranges, leg_outline, leg_state, merge, outline, trip_days, trip_from_legs, trip_nights,
+)
+from prompts import TASKS, plan_messages, section_messages
+
+WEEK = {"departure_date": "2025-11-01", "return_date": "2025-11-08"}
+TRIP = {
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "adult",
+    "accommodation_type": "hostel",
+    "interests": ["food", "culture"],
+}
+
+
+def test_a_week_is_seven_nights_over_eight_days():
+    assert trip_days(WEEK) == 8
+    assert trip_nights(WEEK) == 7
+    assert trip_nights({"departure_date": "2025-11-01", "return_date": "2025-11-01"}) == 0
+    assert trip_nights({"departure_date": "soon"}) == 0
+
+
+def test_day_ranges_cover_every_day():
+    ranges = day_ranges(WEEK, 3)
+    assert [(first, last) for first, last, _, _ in ranges] == [(1, 3), (4, 6), (7, 8)]
+    assert ranges[-1][3].isoformat() == "2025-11-08"
+
+
+def test_section_stream_releases_sections_in_order():
+    sections = [{"index": 0, "text": "Welcome"}, {"index": 1, "text": "Day 1-3"}, {"index": 2, "text": ""}]
+    stream = SectionStream()
+    out = [
+        stream.token(1, "Day "),
+        stream.token(0, "Wel"),
+        stream.token(0, "come"),
+        stream.done(2, ""),
+        stream.done(0, "Welcome"),
+        stream.token(1, "1-3"),
+        stream.done(1, "Day 1-3"),
+    ]
+
+    assert out[:3] == ["", "Wel", "come"]
+    assert out[3] == ""
+    assert out[4] == "\n\n---\n\nDay "
+    assert "".join(out) == stream.text == merge(sections)
+
+
+def test_long_leg_sections_follow_the_whole_trip():
+    trip = trip_from_legs({
+        "legs": [
+            {"country": "Japan", "departure_date": "2025-11-01", "return_date": "2025-11-04"},
+            {"country": "Korea", "departure_date": "2025-11-04", "return_date": "2025-11-15"},
+        ],
+    })
+    route, tokyo, seoul = leg_outline(trip)
+    assert (tokyo["first_day"], seoul["first_day"]) == (1, 4)
+
+    state = {**TRIP, **leg_state(trip, seoul)}
+    sections = outline(state, chunk_days=3, token_budget=500)
+    days = [(s["first_day"], s["last_day"]) for s in sections if s["kind"] == "days"]
+    assert days == [(4, 6), (7, 9), (10, 12), (13, 15)]
+
+    overview = section_messages(state, sections[0])[1].content
+    assert "Korea part (leg 2 of 2" in overview
+    assert TASKS["overview"] not in overview
+    assert "numbering the days from Day 4" in plan_messages(state)[1].content
@@ -0,0 +1,52 @@
+import time
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobStore
+
+
+def test_claim_runs_oldest_first(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    first = store.submit({"country": "Japan"})
+    time.sleep(0.01)
+    store.submit({"country": "Italy"})
+
+    assert store.claim() == (first, {"country": "Japan"})
+    assert store.get(first)["status"] == RUNNING
+    assert store.counts() == {RUNNING: 1, QUEUED: 1}
+
+
+def test_expired_lease_goes_back_to_the_queue(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"), lease=0.05)
+    job_id = store.submit({"country": "Japan"})
+    assert store.claim()[0] == job_id
+
+    assert store.claim() is None
+    time.sleep(0.1)
+    assert store.claim()[0] == job_id
+    assert store.get(job_id)["attempts"] == 2
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"), lease=0.2)
+    job_id = store.submit({"country": "Japan"})
+    store.claim()
+    for _ in range(3):
+        time.sleep(0.1)
+        store.heartbeat(job_id)
+        assert store.claim() is None
+
+    store.finish(job_id, result="itinerary")
+    assert store.get(job_id)["status"] == DONE
+    assert store.get(job_id)["final_result"] == "itinerary"
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"), lease=0.01, max_attempts=2)
+    job_id = store.submit({"country": "Japan"})
+    for _ in range(2):
+        assert store.claim()[0] == job_id
+        time.sleep(0.03)
+
+    assert store.claim() is None
+    job = store.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"] == "worker lost too many times"
@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from fakes import FakeSearch
+from knowledge_index import IndexedSearch, KnowledgeIndex, write_index
+
+DAY = 86400
+FOOD = "top things to do in Japan for food"
+HOSTEL = "best budget hostel in Japan 2025"
+
+
+def fetched(fetched_at, content="Ramen and sushi food tour in Tokyo"):
+    return [
+        (FOOD, "Japan", fetched_at, [{"url": "https://example.com/ramen", "content": content}]),
+        (HOSTEL, "Japan", fetched_at, [{"url": "https://example.com/hostel", "content": "Cheap hostel in Kyoto"}]),
+        ("top things to do in Italy for food", "Italy", fetched_at,
+         [{"url": "https://example.com/pasta", "content": "Pasta and pizza food tour in Rome"}]),
+    ]
+
+
+class FailingSearch:
+    def invoke(self, input):
+        raise ConnectionError("tavily down")
+
+    async def ainvoke(self, input):
+        raise ConnectionError("tavily down")
+
+
+def test_lookup_is_by_normalized_query_and_age(tmp_path):
+    write_index(str(tmp_path / "index"), fetched(time.time() - 2 * DAY))
+    index = KnowledgeIndex.open(str(tmp_path / "index"))
+
+    assert [r["url"] for r in index.lookup("Top things to do in  japan for FOOD", 7 * DAY)] == ["https://example.com/ramen"]
+    assert index.lookup(FOOD, DAY) is None
+    assert index.lookup("top things to do in Japan for nightlife", 7 * DAY) is None
+    assert KnowledgeIndex.open(str(tmp_path / "missing")) is None
+
+
+def test_search_stays_within_the_named_country(tmp_path):
+    write_index(str(tmp_path / "index"), fetched(time.time()))
+    index = KnowledgeIndex.open(str(tmp_path / "index"))
+
+    assert [r["url"] for r in index.search("food tour in Japan")] == ["https://example.com/ramen", "https://example.com/hostel"]
+    assert [r["url"] for r in index.search("food tour in Italy")] == ["https://example.com/pasta"]
+    assert index.search("top things to do in Peru for food") == []
+
+
+def test_fresh_entries_answer_without_searching(tmp_path):
+    write_index(str(tmp_path / "index"), fetched(time.time()))
+    search = IndexedSearch(FakeSearch(), str(tmp_path / "index"), max_age=DAY)
+
+    assert search.invoke({"query": FOOD})["results"][0]["url"] == "https://example.com/ramen"
+    assert search.search.calls == 0
+    assert search.invoke({"query": "top things to do in Japan for nightlife"})["results"][0]["url"].startswith(
+        "https://example.com/top-things"
+    )
+    assert search.search.calls == 1
+
+
+def test_failed_search_falls_back_to_the_index(tmp_path):
+    write_index(str(tmp_path / "index"), fetched(time.time() - 30 * DAY))
+    search = IndexedSearch(FailingSearch(), str(tmp_path / "index"), max_age=DAY)
+
+    result = search.invoke({"query": "top things to do in Japan for food, culture"})
+    assert result["degraded"] is True
+    assert result["results"][0]["url"] == "https://example.com/ramen"
+    assert search.fallbacks == 1
+    with pytest.raises(ConnectionError):
+        search.invoke({"query": "top things to do in Peru for food"})
+
+
+def test_rebuild_swaps_the_index_under_open_readers(tmp_path):
+    path = str(tmp_path / "index")
+    write_index(path, fetched(time.time()))
+    search = IndexedSearch(FakeSearch(), path, max_age=DAY)
+    old = search.index
+
+    write_index(path, fetched(time.time(), content="Izakaya crawl in Osaka"))
+    # The old mapping still reads the files it had open.
+    assert old.lookup(FOOD, DAY)[0]["content"] == "Ramen and sushi food tour in Tokyo"
+    assert search.invoke({"query": FOOD})["results"][0]["content"] == "Izakaya crawl in Osaka"
+    assert sorted(os.listdir(tmp_path)) == ["index"]
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import app
+from cache import DiskCache
+from degradation import SINGLE_QUERY
+from jobs import DONE, JobRunner, JobStore
+from plan_cache import PlanCache, Uncached
+
+REQUEST = {"country": "Japan", "interests": ["food"], "departure_date": "2025-11-01", "return_date": "2025-11-08"}
+
+
+class SlowAgent:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, request, config=None):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        return {"final_trip": "Day 1: arrive"}
+
+
+class Degraded:
+    def level(self):
+        return SINGLE_QUERY
+
+
+def test_job_coalesced_onto_a_degraded_leader_stores_the_itinerary(tmp_path, monkeypatch):
+    agent = SlowAgent()
+    monkeypatch.setattr(app, "travel_agent", agent)
+    monkeypatch.setattr(app, "degradation", Degraded())
+    monkeypatch.setattr(app, "plan_cache", PlanCache(DiskCache(str(tmp_path / "plans.sqlite"), "plans")))
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+
+    async def scenario():
+        leader = asyncio.ensure_future(app.plan_cache.arun(REQUEST, app.plan))
+        await asyncio.sleep(0.05)
+        job_id = store.submit(REQUEST)
+        runner = JobRunner(store, app.plan_job, workers=1, poll_interval=0.01)
+        runner.start()
+        try:
+            assert await leader == ("Day 1: arrive", SINGLE_QUERY)
+            for _ in range(100):
+                if store.get(job_id)["status"] == DONE:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await runner.stop()
+        return store.get(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == DONE
+    assert job["final_result"] == "Day 1: arrive"
+    assert agent.calls == 1
+    assert app.plan_cache.coalesced == 1
+
+
+def test_concurrent_identical_requests_make_one_call(tmp_path):
+    cache = PlanCache(DiskCache(str(tmp_path / "plans.sqlite"), "plans"))
+    calls = []
+
+    async def plan(request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return "Day 1: arrive"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.arun(dict(REQUEST), plan) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["Day 1: arrive"] * 5
+    assert len(calls) == 1
+    assert asyncio.run(cache.arun(REQUEST, plan)) == "Day 1: arrive"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["coalesced"]) == (1, 1, 4)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_threaded_callers_share_one_call(tmp_path):
+    cache = PlanCache(DiskCache(str(tmp_path / "plans.sqlite"), "plans"))
+    calls = []
+
+    def plan(request):
+        calls.append(request)
+        time.sleep(0.05)
+        return "Day 1: arrive"
+
+    threads = [threading.Thread(target=cache.run, args=(REQUEST, plan)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 3)
+
+
+def test_stats_without_a_store(tmp_path):
+    # PLAN_CACHE_TTL=0: the store counts nothing, every run is a miss and none is stored.
+    cache = PlanCache(DiskCache(str(tmp_path / "plans.sqlite"), "plans", ttl=0))
+
+    async def plan(request):
+        await asyncio.sleep(0.01)
+        return Uncached("Day 1: arrive") if request["country"] == "Peru" else "Day 1: arrive"
+
+    async def scenario():
+        await asyncio.gather(cache.arun(REQUEST, plan), cache.arun(REQUEST, plan))
+        await cache.arun(REQUEST, plan)
+        await cache.arun({**REQUEST, "country": "Peru"}, plan)
+        assert await cache.aget(cache.key(REQUEST)) is None
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["coalesced"]) == (0, 3, 1)
+    assert stats["hit_rate"] == 0.0
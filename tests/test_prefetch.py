@@ -0,0 +1,80 @@
+import gc
+import time
+
+from fakes import FakeSearch
+from knowledge_index import IndexedSearch, write_index
+from prefetch import Prefetcher
+
+QUERIES = ["top things to do in Japan for food", "best budget hostel in Japan 2025"]
+DAY = 86400
+
+
+def indexed(tmp_path, fetched_at):
+    results = [{"url": "https://example.com/stored", "content": "Stored result"}]
+    write_index(str(tmp_path / "index"), [(query, "Japan", fetched_at, results) for query in QUERIES])
+    return IndexedSearch(FakeSearch(), str(tmp_path / "index"), max_age=DAY)
+
+
+def settle(prefetcher, queries):
+    prefetcher.update(queries)
+    time.sleep(prefetcher.delay + 0.1)
+
+
+def test_prefetched_results_reach_the_run():
+    search = FakeSearch(default_delay=0.01)
+    prefetcher = Prefetcher(search, delay=0.01, max_wasted=6)
+    settle(prefetcher, QUERIES)
+
+    research = prefetcher.collect(QUERIES, timeout=1.0)
+    assert list(research) == QUERIES
+    assert search.calls == 2
+    prefetcher.close()
+
+
+def test_fresh_index_entries_are_reused_without_searching(tmp_path):
+    search = indexed(tmp_path, fetched_at=time.time())
+    prefetcher = Prefetcher(search, delay=0.01, max_age=DAY)
+    settle(prefetcher, QUERIES)
+
+    research = prefetcher.collect(QUERIES, timeout=1.0)
+    assert [r["url"] for r in research[QUERIES[0]]] == ["https://example.com/stored"]
+    assert search.search.calls == 0
+    prefetcher.close()
+
+
+def test_stale_index_entries_are_searched_again(tmp_path):
+    search = indexed(tmp_path, fetched_at=time.time() - 30 * DAY)
+    prefetcher = Prefetcher(search, delay=0.01, max_age=DAY)
+    settle(prefetcher, QUERIES)
+
+    research = prefetcher.collect(QUERIES, timeout=1.0)
+    assert research[QUERIES[0]][0]["url"].startswith("https://example.com/top-things")
+    assert search.search.calls == 2
+    # Degraded runs still see stale entries.
+    assert search.peek({"query": QUERIES[0]}) is not None
+    prefetcher.close()
+
+
+def test_dropping_the_prefetcher_stops_its_threads():
+    prefetcher = Prefetcher(FakeSearch(default_delay=0.01), delay=0.01)
+    settle(prefetcher, QUERIES)
+    prefetcher.collect(QUERIES, timeout=1.0)
+    pool = prefetcher._pool
+
+    del prefetcher
+    gc.collect()
+    assert pool._shutdown
+    for thread in list(pool._threads):
+        thread.join(timeout=1.0)
+        assert not thread.is_alive()
+
+
+def test_close_cancels_pending_work():
+    search = FakeSearch(default_delay=0.01)
+    prefetcher = Prefetcher(search, delay=0.05)
+    prefetcher.update(QUERIES)
+    prefetcher.close()
+    time.sleep(0.1)
+
+    assert search.calls == 0
+    assert prefetcher.collect(QUERIES) == {}
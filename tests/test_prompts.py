@@ -0,0 +1,31 @@
+import string
+
+from prompts import STATIC_PREFIX, TASKS, build_messages, section_messages
+
+STATE = {
+    "country": "Japan",
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-08",
+    "travel_style": "budget",
+    "trip_type": "solo",
+    "age_group": "adult",
+    "accommodation_type": "hostel",
+    "interests": ["food", "culture"],
+    "search_results": "[1] Tokyo food tour - https://example.com/tour",
+}
+
+
+def test_static_prefix_has_no_format_fields():
+    assert not any(field for _, field, _, _ in string.Formatter().parse(STATIC_PREFIX) if field is not None)
+    assert "{" not in STATIC_PREFIX and "}" not in STATIC_PREFIX
+
+
+def test_system_message_is_the_same_for_every_task():
+    first = build_messages(STATE)
+    overview = section_messages(STATE, {"index": 0, "kind": "overview", "search_results": "other"})
+    assert first[0].content == overview[0].content == STATIC_PREFIX
+
+
+def test_search_results_come_before_user_fields_and_task():
+    content = build_messages(STATE)[1].content
+    assert content.index(STATE["search_results"]) < content.index("Japan") < content.index(TASKS["itinerary"])
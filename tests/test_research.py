@@ -0,0 +1,40 @@
+import asyncio
+
+from fakes import FakeSearch
+from research import asearch_each, build_queries, flatten, search_each
+
+STATE = {
+    "country": "Japan",
+    "travel_style": "budget",
+    "accommodation_type": "hostel",
+    "interests": ["food", "culture"],
+    "departure_date": "2025-11-01",
+}
+
+
+def test_search_each_keeps_results_that_beat_the_deadline():
+    search = FakeSearch(delays={"slow": 2.0}, default_delay=0.01)
+    done = {}
+    results = search_each(search, ["fast one", "slow one"], timeout=0.3, on_done=done.__setitem__)
+
+    assert list(results) == ["fast one"]
+    assert len(results["fast one"]) == 3
+    assert done == {"fast one": results["fast one"], "slow one": None}
+
+
+def test_asearch_each_keeps_results_that_beat_the_deadline():
+    search = FakeSearch(delays={"slow": 2.0}, default_delay=0.01)
+    results = asyncio.run(asearch_each(search, ["fast one", "slow one"], timeout=0.3))
+
+    assert list(results) == ["fast one"]
+
+
+def test_flatten_follows_query_order_and_skips_missing():
+    results = {"b": [{"url": "b1"}], "a": [{"url": "a1"}, {"url": "a2"}]}
+    assert [r["url"] for r in flatten(["a", "missing", "b"], results)] == ["a1", "a2", "b1"]
+
+
+def test_build_queries():
+    queries = build_queries(STATE)
+    assert len(queries) == 3
+    assert all("Japan" in q for q in queries)
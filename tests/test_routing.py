@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from fakes import FakeChatModel
+from routing import ModelRouter
+
+TRIP = {
+    "departure_date": "2025-11-01",
+    "return_date": "2025-11-05",
+    "travel_style": "budget",
+    "interests": ["food", "culture"],
+}
+
+
+class BrokenChatModel(FakeChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise ConnectionError("openai down")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise ConnectionError("openai down")
+
+
+@pytest.fixture
+def models():
+    return FakeChatModel(reply="fast"), FakeChatModel(reply="strong")
+
+
+@pytest.mark.parametrize("trip, reason", [
+    (TRIP, "simple"),
+    ({**TRIP, "return_date": "2025-11-06"}, "long_trip"),
+    ({**TRIP, "interests": ["food", "culture", "nature", "history"]}, "many_interests"),
+    ({**TRIP, "travel_style": "luxury"}, "style"),
+])
+def test_route_picks_the_fast_model_only_for_simple_trips(models, trip, reason):
+    fast, strong = models
+    router = ModelRouter(fast, strong, max_nights=4, max_interests=3, fast_styles=["budget"])
+    chosen, why = router.route(trip)
+
+    assert why == reason
+    assert chosen == ([fast, strong] if reason == "simple" else [strong, fast])
+
+
+def test_sections_are_routed_on_their_own_length(models):
+    fast, strong = models
+    router = ModelRouter(fast, strong, max_nights=4)
+    long_trip = {**TRIP, "return_date": "2025-11-20"}
+
+    assert router.route(long_trip)[1] == "long_trip"
+    assert router.route(long_trip, nights=2)[1] == "simple"
+
+
+def test_single_model_and_no_fallback(models):
+    fast, strong = models
+    assert ModelRouter(fast).route(TRIP) == ([fast], "single")
+    assert ModelRouter(fast, strong, fallback=False).route(TRIP)[0] == [fast]
+
+
+def test_a_failing_model_falls_back_to_the_other(models):
+    _, strong = models
+    router = ModelRouter(BrokenChatModel(), strong)
+
+    assert router.invoke("plan", TRIP).content == "strong"
+    assert asyncio.run(router.ainvoke("plan", TRIP)).content == "strong"
+
+
+def test_a_slow_model_falls_back_after_the_timeout(models):
+    _, strong = models
+    router = ModelRouter(FakeChatModel(reply="slow", latency=2.0), strong, fallback_timeout=0.1)
+
+    assert router.invoke("plan", TRIP).content == "strong"
+    assert asyncio.run(router.ainvoke("plan", TRIP)).content == "strong"
+
+
+def test_the_last_model_failing_raises():
+    router = ModelRouter(BrokenChatModel(), BrokenChatModel())
+    with pytest.raises(ConnectionError):
+        router.invoke("plan", TRIP)
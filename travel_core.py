@@ -0,0 +1,355 @@
+"""LangGraph travel agent: state, graph construction and lazily built clients.
+
+Nothing here imports Streamlit, and the OpenAI client library and the shared
+HTTP pool are only loaded when a client is first used, so the API and CLI
+start quickly.
+"""
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from langgraph.config import get_stream_writer
+from typing import Annotated, TypedDict, Literal
+from langchain_core.runnables import RunnableLambda
+from research import build_queries, search_each, asearch_each, flatten, reusable_research
+from cache import DiskCache, CachedSearch
+from plan_cache import PlanCache
+from compaction import compact_results, count_tokens
+from itinerary import trip_nights, outline, merge, leg_outline, leg_state
+from admission import RateLimitedSearch, openai_limit, tavily_limit
+from knowledge_index import IndexedSearch
+from routing import ModelRouter
+from degradation import (
+    FULL, STORED_ONLY, NO_RESEARCH, select_queries, trim_research, context_budget, stored_research, astored_research,
+)
+from prompts import STATIC_PREFIX, PREFIX_SHA, plan_messages, section_messages, prompt_text
+import os
+import threading
+import config
+import metrics
+from metrics import InstrumentedSearch, timed_node
+from research import query_kind
+
+
+def make_llm(model=None):
+    from langchain_openai import ChatOpenAI
+    from upstream_http import http_pool
+    return ChatOpenAI(
+        model=model or config.openai_model,
+        streaming=True,
+        stream_usage=True,
+        max_retries=config.openai_max_retries,
+        http_client=http_pool.client,
+        http_async_client=http_pool.async_client,
+        timeout=http_pool.timeout("openai"),
+    )
+
+
+def make_search(max_results=None):
+    from upstream_http import TavilyClient, http_pool
+    return TavilyClient(
+        http_pool,
+        api_key=os.environ["TAVILY_API_KEY"],
+        base_url=config.tavily_base_url,
+        max_results=max_results or config.search_max_results,
+    )
+
+
+class LazyClient:
+    """Builds the wrapped client with `factory()` the first time it is used"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def collect_sections(current, update):
+    """Reducer for the map step: None clears the list, a list is appended"""
+    if update is None:
+        return []
+    return (current or []) + update
+
+
+def add_usage(current, update):
+    """Reducer for per-run token counts: None clears them, a dict is added in"""
+    if update is None:
+        return {}
+    current = dict(current or {})
+    for key, value in update.items():
+        current[key] = current.get(key, 0) + value
+    return current
+
+
+class Travel_Agent(TypedDict):
+    final_trip : str
+    country : str
+    interests : list[str]
+    departure_date : str
+    return_date : str
+    travel_style: Literal["budget", "luxury", "adventure", "relaxation"]
+    trip_type : Literal["solo", "friends", "family"]
+    age_group: Literal["child", "teen", "adult", "senior"]
+    accommodation_type: Literal["hotel", "hostel", "apartment", "bnb", "camping"]
+    research: dict[str, list[dict]]
+    research_reused: int
+    raw_results: list[dict]
+    search_results: str
+    compaction_stats: dict
+    outline: list[dict]
+    sections: Annotated[list[dict], collect_sections]
+    token_usage: Annotated[dict, add_usage]
+    degradation: int
+    legs: list[dict]
+    leg: dict
+
+
+def build_travel_agent(llm, search, search_timeout=None, token_budget=config.context_token_budget,
+                       llm_limit=None, checkpointer=None, long_trip_nights=config.long_trip_nights,
+                       chunk_days=config.chunk_days):
+    """Compile the research -> compaction -> planning graph around the given LLM and search clients.
+
+    `llm` is a chat model or a routing.ModelRouter choosing between a fast and a strong model per request.
+    `llm_limit` is an optional admission.UpstreamLimit the planner waits on before calling the LLM.
+    Trips of more than `long_trip_nights` nights (0 disables this) are planned map-reduce style:
+    an outline step splits them into an overview plus `chunk_days`-day ranges, every section is
+    written concurrently from its own slice of the research, and a merge step joins them. The
+    model calls of a section carry its index as `section` in their run metadata, so stream
+    consumers can tell the sections' tokens apart.
+    Trips with more than one entry in `legs` (ordered {country, departure_date, return_date})
+    are planned the same way: every leg runs this graph as its own single-destination trip,
+    concurrently with the others and with a route overview, and the merge step joins them.
+    A `degradation` level in the input state (see degradation.py) trims research under load.
+    With a `checkpointer`, re-running a thread with changed inputs only re-issues the
+    search queries whose text changed; results for the others come from the saved state.
+    """
+
+    def research_update(queries, research, reused, level):
+        return {
+            "research": research,
+            "research_reused": reused,
+            "raw_results": flatten(queries, trim_research(research, level)),
+            "token_usage": None,
+        }
+
+    router = llm if isinstance(llm, ModelRouter) else ModelRouter(llm)
+
+    def section_nights(section):
+        # Sections are short whatever the trip length, so they are routed on their own size.
+        return section["last_day"] - section["first_day"] if section["kind"] == "days" else 0
+
+    def section_config(section):
+        return {"metadata": {"section": section["index"]}}
+
+    def llm_cost(messages):
+        return count_tokens(prompt_text(messages)) + config.completion_token_estimate
+
+    def search_reporter(research):
+        """on_done callback that emits a "search" event on stream_mode="custom" as each query lands"""
+        writer = get_stream_writer()
+
+        def report(query, results, source="tavily"):
+            count = None if results is None else len(results)
+            writer({"event": "search", "query": query, "kind": query_kind(query), "results": count, "source": source})
+
+        for query, results in research.items():
+            report(query, results, source="reused")
+        return report
+
+    def research_node(state: Travel_Agent):
+        """Search for current travel information about the destination"""
+        level = state.get("degradation", FULL)
+        if level >= NO_RESEARCH:
+            return research_update([], {}, 0, level)
+        queries = select_queries(build_queries(state), level)
+        research = reusable_research(state, queries)
+        reused = len(research)
+        missing = [q for q in queries if q not in research]
+        if level >= STORED_ONLY:
+            research.update(stored_research(search, missing))
+        else:
+            on_done = search_reporter(research)
+            research.update(search_each(search, missing, timeout=search_timeout, on_done=on_done))
+        return research_update(queries, research, reused, level)
+
+    async def aresearch_node(state: Travel_Agent):
+        """Search for current travel information about the destination"""
+        level = state.get("degradation", FULL)
+        if level >= NO_RESEARCH:
+            return research_update([], {}, 0, level)
+        queries = select_queries(build_queries(state), level)
+        research = reusable_research(state, queries)
+        reused = len(research)
+        missing = [q for q in queries if q not in research]
+        if level >= STORED_ONLY:
+            research.update(await astored_research(search, missing))
+        else:
+            on_done = search_reporter(research)
+            research.update(await asearch_each(search, missing, timeout=search_timeout, on_done=on_done))
+        return research_update(queries, research, reused, level)
+
+    def compaction_node(state: Travel_Agent):
+        """Dedup and rank the search results and fit them into the prompt token budget"""
+        budget = context_budget(token_budget, state.get("degradation", FULL))
+        search_results, stats = compact_results(state.get("raw_results", []), state, budget)
+        metrics.context_tokens.observe(stats["context_tokens"])
+        metrics.context_tokens_saved.inc(stats["tokens_saved"])
+        return {"search_results": search_results, "compaction_stats": stats}
+
+    def generate(messages, state, nights=None, config=None):
+        acquire = None if llm_limit is None else (lambda: llm_limit.acquire(llm_cost(messages)))
+        response = router.invoke(messages, state, acquire, nights=nights, config=config)
+        return response.content, metrics.token_usage(response)
+
+    async def agenerate(messages, state, nights=None, config=None):
+        aacquire = None if llm_limit is None else (lambda: llm_limit.aacquire(llm_cost(messages)))
+        response = await router.ainvoke(messages, state, aacquire, nights=nights, config=config)
+        return response.content, metrics.token_usage(response)
+
+    def trip_planner_node(state: Travel_Agent):
+        """Generate personalized itinerary using search results"""
+        text, usage = generate(plan_messages(state), state)
+        return {"final_trip": text, "token_usage": usage}
+
+    async def atrip_planner_node(state: Travel_Agent):
+        """Generate personalized itinerary using search results"""
+        text, usage = await agenerate(plan_messages(state), state)
+        return {"final_trip": text, "token_usage": usage}
+
+    def route_trip(state: Travel_Agent):
+        return "legs_node" if len(state.get("legs") or []) > 1 else "research_node"
+
+    def route_planner(state: Travel_Agent):
+        if long_trip_nights and trip_nights(state) > long_trip_nights:
+            return "outline_node"
+        return "trip_planner_node"
+
+    def outline_node(state: Travel_Agent):
+        """Split a long trip into an overview and day ranges, each with its own research slice"""
+        level = state.get("degradation", FULL)
+        trimmed = {**state, "research": trim_research(state.get("research", {}), level)}
+        return {"outline": outline(trimmed, chunk_days, context_budget(token_budget, level)), "sections": None}
+
+    def legs_node(state: Travel_Agent):
+        """Split a multi-leg trip into a route overview and one single-destination plan per leg"""
+        return {"outline": leg_outline(state), "sections": None, "token_usage": None}
+
+    def fan_out(state: Travel_Agent):
+        return [
+            Send("leg_node", leg_state(state, section)) if section["kind"] == "leg"
+            else Send("section_node", {**state, "section": section})
+            for section in state["outline"]
+        ]
+
+    def section_node(state):
+        """Write one section of a long itinerary"""
+        section = state["section"]
+        text, usage = generate(
+            section_messages(state, section), state, nights=section_nights(section), config=section_config(section)
+        )
+        return {"sections": [{"index": section["index"], "text": text}], "token_usage": usage}
+
+    async def asection_node(state):
+        """Write one section of a long itinerary"""
+        section = state["section"]
+        text, usage = await agenerate(
+            section_messages(state, section), state, nights=section_nights(section), config=section_config(section)
+        )
+        return {"sections": [{"index": section["index"], "text": text}], "token_usage": usage}
+
+    def leg_update(leg, result):
+        section = {"index": leg["index"], "text": result["final_trip"], "research": result.get("research", {})}
+        return {"sections": [section], "token_usage": result.get("token_usage") or {}}
+
+    def leg_node(state: Travel_Agent):
+        """Research and plan one leg of a multi-leg trip with the single-destination graph"""
+        return leg_update(state["leg"], trip_graph.invoke(state))
+
+    async def aleg_node(state: Travel_Agent):
+        """Research and plan one leg of a multi-leg trip with the single-destination graph"""
+        return leg_update(state["leg"], await trip_graph.ainvoke(state))
+
+    def merge_node(state: Travel_Agent):
+        """Join the written sections into one brochure"""
+        update = {"final_trip": merge(state["sections"])}
+        # Keep every leg's research in the checkpoint so a re-plan can reuse it.
+        research = {q: r for section in state["sections"] for q, r in section.get("research", {}).items()}
+        if research:
+            update["research"] = research
+        return update
+
+    graph = StateGraph(Travel_Agent)
+
+    graph.add_node("research_node", RunnableLambda(
+        timed_node("research_node", research_node), afunc=timed_node("research_node", aresearch_node)
+    ))
+    graph.add_node("compaction_node", timed_node("compaction_node", compaction_node))
+    graph.add_node("trip_planner_node", RunnableLambda(
+        timed_node("trip_planner_node", trip_planner_node), afunc=timed_node("trip_planner_node", atrip_planner_node)
+    ))
+
+    graph.add_node("outline_node", timed_node("outline_node", outline_node))
+    graph.add_node("section_node", RunnableLambda(
+        timed_node("section_node", section_node), afunc=timed_node("section_node", asection_node)
+    ))
+    graph.add_node("merge_node", timed_node("merge_node", merge_node))
+    graph.add_node("legs_node", timed_node("legs_node", legs_node))
+    graph.add_node("leg_node", RunnableLambda(
+        timed_node("leg_node", leg_node), afunc=timed_node("leg_node", aleg_node)
+    ))
+
+    graph.add_conditional_edges(START, route_trip, ["research_node", "legs_node"])
+    graph.add_edge("research_node", "compaction_node")
+    graph.add_conditional_edges("compaction_node", route_planner, ["trip_planner_node", "outline_node"])
+    graph.add_edge("trip_planner_node", END)
+    graph.add_conditional_edges("outline_node", fan_out, ["section_node"])
+    graph.add_conditional_edges("legs_node", fan_out, ["section_node", "leg_node"])
+    graph.add_edge("section_node", "merge_node")
+    graph.add_edge("leg_node", "merge_node")
+    graph.add_edge("merge_node", END)
+
+    # Legs run through the same graph; their inputs have no `legs`, so they never fan out again.
+    trip_graph = graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+
+search_cache = DiskCache(
+    config.cache_path,
+    "search_results",
+    ttl=config.search_cache_ttl,
+    max_entries=config.search_cache_max_entries,
+    name="search",
+)
+plan_store = DiskCache(
+    config.cache_path,
+    "plans",
+    ttl=config.plan_cache_ttl,
+    max_entries=config.plan_cache_max_entries,
+)
+
+llm = LazyClient(lambda: make_llm(config.fast_model))
+strong_llm = LazyClient(lambda: make_llm(config.strong_model))
+router = ModelRouter(llm, strong_llm if config.strong_model != config.fast_model else None)
+tavily_client = LazyClient(make_search)
+knowledge_search = IndexedSearch(
+    CachedSearch(
+        RateLimitedSearch(InstrumentedSearch(tavily_client, query_kind), tavily_limit),
+        search_cache,
+    ),
+    config.knowledge_index_path,
+    max_age=config.knowledge_index_max_age,
+)
+tavily_search = knowledge_search
+search_timeout = config.search_timeout
+metrics.prompt_prefix.labels(PREFIX_SHA).set_function(lambda: count_tokens(STATIC_PREFIX))
+
+travel_agent = build_travel_agent(router, tavily_search, search_timeout=search_timeout, llm_limit=openai_limit)
+plan_cache = PlanCache(plan_store, namespace=f"{config.fast_model}|{config.strong_model}")
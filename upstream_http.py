@@ -0,0 +1,180 @@
+"""Shared, pooled HTTP transport for the OpenAI and Tavily clients.
+
+One sync and one async httpx client per process, with bounded connection
+pools, keep-alive and HTTP/2 when the `h2` package is installed. Each upstream
+gets its own connect/read timeouts. Request counts, in-flight requests and
+pool occupancy are tracked per upstream host for `stats()`.
+"""
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+
+import capture
+import config
+
+try:
+    import h2  # noqa: F401
+    http2_available = True
+except ImportError:
+    http2_available = False
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    def __init__(self, pool, **kwargs):
+        super().__init__(**kwargs)
+        self._http_pool = pool
+
+    def handle_request(self, request):
+        host = request.url.host
+        recording = capture.current.get()
+        sent = time.perf_counter()
+        self._http_pool._begin(host)
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            self._http_pool._end(host, error=True)
+            raise
+        self._http_pool._end(host, error=response.status_code >= 500 or response.status_code == 429)
+        if recording is not None:
+            return capture.record(recording, request, response, sent)
+        return response
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, pool, **kwargs):
+        super().__init__(**kwargs)
+        self._http_pool = pool
+
+    async def handle_async_request(self, request):
+        host = request.url.host
+        recording = capture.current.get()
+        sent = time.perf_counter()
+        self._http_pool._begin(host)
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            self._http_pool._end(host, error=True)
+            raise
+        self._http_pool._end(host, error=response.status_code >= 500 or response.status_code == 429)
+        if recording is not None:
+            return capture.arecord(recording, request, response, sent)
+        return response
+
+
+class HttpPool:
+    def __init__(self, max_connections=100, max_keepalive=20, keepalive_expiry=30.0, http2=True):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and http2_available
+        self.timeouts = {}
+        self._counts = defaultdict(lambda: {"requests": 0, "in_flight": 0, "errors": 0})
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+
+    def set_timeout(self, upstream, connect, read):
+        self.timeouts[upstream] = httpx.Timeout(read, connect=connect)
+
+    def timeout(self, upstream):
+        return self.timeouts.get(upstream, httpx.Timeout(30.0, connect=5.0))
+
+    def _begin(self, host):
+        with self._lock:
+            self._counts[host]["requests"] += 1
+            self._counts[host]["in_flight"] += 1
+
+    def _end(self, host, error):
+        with self._lock:
+            self._counts[host]["in_flight"] -= 1
+            self._counts[host]["errors"] += int(error)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        transport=_CountingTransport(self, limits=self.limits, http2=self.http2)
+                    )
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = httpx.AsyncClient(
+                        transport=_AsyncCountingTransport(self, limits=self.limits, http2=self.http2)
+                    )
+        return self._async_client
+
+    def _pool_usage(self, client):
+        # httpx does not expose pool occupancy publicly; read it from httpcore when we can.
+        if client is None:
+            return {}
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        usage = defaultdict(lambda: {"connections": 0, "idle": 0})
+        for connection in getattr(pool, "connections", []):
+            origin = getattr(connection, "_origin", None)
+            host = origin.host.decode() if origin is not None else "unknown"
+            usage[host]["connections"] += 1
+            usage[host]["idle"] += int(connection.is_idle())
+        return dict(usage)
+
+    def stats(self):
+        with self._lock:
+            counts = {host: dict(c) for host, c in self._counts.items()}
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "requests": counts,
+            "sync_pool": self._pool_usage(self._client),
+            "async_pool": self._pool_usage(self._async_client),
+        }
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+class TavilyClient:
+    """Tavily /search over the shared pool; a drop-in for TavilySearch.invoke/ainvoke"""
+
+    def __init__(self, pool, api_key, base_url="https://api.tavily.com", max_results=7):
+        self.pool = pool
+        self.url = base_url.rstrip("/") + "/search"
+        self.max_results = max_results
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+
+    def _body(self, input):
+        return {"query": input["query"], "max_results": self.max_results}
+
+    def invoke(self, input):
+        response = self.pool.client.post(
+            self.url, json=self._body(input), headers=self.headers, timeout=self.pool.timeout("tavily")
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def ainvoke(self, input):
+        response = await self.pool.async_client.post(
+            self.url, json=self._body(input), headers=self.headers, timeout=self.pool.timeout("tavily")
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+http_pool = HttpPool(
+    max_connections=config.http_max_connections,
+    max_keepalive=config.http_max_keepalive,
+    keepalive_expiry=config.http_keepalive_expiry,
+    http2=config.http2,
+)
+http_pool.set_timeout("openai", connect=config.openai_connect_timeout, read=config.openai_read_timeout)
+http_pool.set_timeout("tavily", connect=config.tavily_connect_timeout, read=config.tavily_read_timeout)